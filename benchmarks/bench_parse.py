@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark WeatherScraper page parsing: 'full' (html.parser) vs 'fast' (lxml, trimmed tree)
+
+Usage:
+  python benchmarks/bench_parse.py                       # every saved page in benchmarks/pages/
+  python benchmarks/bench_parse.py page1.html page2.html
+  python benchmarks/bench_parse.py --save 44512          # fetch a live page into benchmarks/pages/
+
+With no saved pages it falls back to a synthetic multi-megabyte page so it
+still runs offline.
+
+Dependencies: requests, beautifulsoup4, lxml
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from bs4_weather import WeatherScraper  # noqa: E402
+
+PAGES_DIR = os.path.join(HERE, "pages")
+DAYS = ["Today", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+def synthetic_page(filler_blocks: int = 20000) -> bytes:
+    """A Wunderground-shaped page: lots of unrelated markup around a header and 7 forecast cards."""
+    blocks = [
+        f'<div class="ad-slot-{i}"><p>Sponsored content block {i} with some words</p>'
+        f'<a href="/news/{i}">Story {i}</a></div>'
+        for i in range(filler_blocks)
+    ]
+    half = filler_blocks // 2
+    cards = "".join(
+        f'<div data-testid="DailyWeatherCard" class="daily-card"><span>{day}</span>'
+        f'<span>{70 + i}°</span><span>{50 + i}°</span><span>Partly Cloudy</span></div>'
+        for i, day in enumerate(DAYS)
+    )
+    html = (
+        "<!doctype html><html><head><title>Weather</title>"
+        "<script>window.analytics = {enabled: true};</script></head><body>"
+        '<header><h1 data-testid="CurrentConditionsHeader">Youngstown, OH Weather Conditions</h1></header>'
+        f"{''.join(blocks[:half])}<section>{cards}</section>{''.join(blocks[half:])}"
+        "</body></html>"
+    )
+    return html.encode("utf-8")
+
+
+def time_parse(scraper, content: bytes, repeat: int) -> float:
+    """Best-of-repeat seconds for one parse_page call."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scraper.parse_page(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def save_page(location: str):
+    scraper = WeatherScraper()
+    url = scraper.base_url + scraper.get_location_url(location)
+    r = scraper.http.get(url, headers=scraper.headers)
+    r.raise_for_status()
+    os.makedirs(PAGES_DIR, exist_ok=True)
+    path = os.path.join(PAGES_DIR, f"{location.replace(',', '').replace(' ', '_').lower()}.html")
+    with open(path, "wb") as f:
+        f.write(r.content)
+    print(f"Saved {len(r.content):,} bytes to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pages", nargs="*", help="saved HTML pages (default: benchmarks/pages/*.html)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="LOCATION", help="fetch and save a live page, then exit")
+    args = parser.parse_args()
+
+    if args.save:
+        save_page(args.save)
+        return
+
+    paths = args.pages or sorted(glob.glob(os.path.join(PAGES_DIR, "*.html")))
+    pages = [(os.path.basename(p), open(p, "rb").read()) for p in paths]
+    if not pages:
+        pages = [("synthetic", synthetic_page())]
+
+    full = WeatherScraper(parse_mode="full")
+    fast = WeatherScraper(parse_mode="fast")
+    print(f"{'page':<28}{'size':>10}{'full ms':>10}{'fast ms':>10}{'speedup':>9}")
+    for name, content in pages:
+        # Both modes must agree, or the speedup is meaningless
+        if full.parse_page(content) != fast.parse_page(content):
+            print(f"{name}: WARNING fast and full parses disagree")
+        t_full = time_parse(full, content, args.repeat)
+        t_fast = time_parse(fast, content, args.repeat)
+        print(f"{name[:27]:<28}{len(content) // 1024:>8}KB{t_full * 1000:>10.1f}"
+              f"{t_fast * 1000:>10.1f}{t_full / t_fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark scrape_batch's parser processes: pages/s at 1, 2, 4 ... workers vs one thread
+
+Usage:
+  python benchmarks/bench_parse_pool.py                  # synthetic pages
+  python benchmarks/bench_parse_pool.py --pages 64 --max-workers 8
+
+Scaling should be close to linear up to the number of cores; the serial row is
+the same parsing done in this process.
+
+Dependencies: beautifulsoup4, lxml
+"""
+
+import os
+import sys
+import time
+import argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from bs4_weather import WeatherScraper  # noqa: E402
+from scrape_batch import parser_pool, parse_records  # noqa: E402
+from bench_parse import synthetic_page  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=32)
+    parser.add_argument("--filler", type=int, default=2000, help="filler blocks per synthetic page")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    pages = [synthetic_page(args.filler)] * args.pages
+    scraper = WeatherScraper()
+    start = time.perf_counter()
+    expected = [scraper.parse_page(page) for page in pages]
+    serial = args.pages / (time.perf_counter() - start)
+    print(f"{'workers':<10}{'pages/s':>10}{'speedup':>9}")
+    print(f"{'serial':<10}{serial:>10.1f}{1.0:>8.1f}x")
+
+    workers = 1
+    while workers <= args.max_workers:
+        with parser_pool(workers) as pool:
+            list(pool.map(parse_records, pages[:workers]))   # process start-up isn't the point
+            start = time.perf_counter()
+            results = list(pool.map(parse_records, pages, chunksize=2))
+            rate = args.pages / (time.perf_counter() - start)
+        if [len(periods) for _, periods in results] != [len(data) for _, data in expected]:
+            print(f"{workers}: WARNING process-pool results differ from the serial parse")
+        print(f"{workers:<10}{rate:>10.1f}{rate / serial:>8.1f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
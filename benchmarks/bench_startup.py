@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the weather CLIs, with a budget
+
+Measures, in fresh interpreters:
+- import time of weathery and bs4_weather, from `python -X importtime`
+  (median of several runs, cumulative microseconds of the top-level module)
+- which heavy modules are loaded after a plain import, and after a weathery
+  lookup that's answered entirely from a warm cache
+
+Fails (exit 1) when an import is over its budget, or when a module that should
+load lazily (requests, geopy, bs4, ...) shows up on a path that doesn't need it.
+
+Usage:
+  python benchmarks/bench_startup.py
+  python benchmarks/bench_startup.py --runs 9 --budget-ms 80
+
+Dependencies: requests, geopy, beautifulsoup4 (only for warming the cache)
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+# Cumulative import time allowed per entry point, in milliseconds
+IMPORT_BUDGET_MS = {"weathery": 100.0, "bs4_weather": 100.0}
+# Modules each path must not load
+LAZY_MODULES = {
+    "weathery": ("requests", "urllib3", "geopy", "bs4", "concurrent.futures.thread"),
+    "bs4_weather": ("requests", "urllib3", "bs4", "lxml", "asyncio"),
+    "cached lookup": ("requests", "urllib3", "geopy", "bs4"),
+}
+
+CACHED_LOOKUP = """
+import sys, json, weathery
+cache_dir, query = sys.argv[1], sys.argv[2]
+weathery.GEOCODE_CACHE_PATH = cache_dir + "/geocode.sqlite"
+weathery.POINTS_CACHE_PATH = cache_dir + "/points.sqlite"
+weathery.FORECAST_CACHE_PATH = cache_dir + "/forecast.sqlite"
+weathery.ZIP_INDEX_PATH = cache_dir + "/no-zip-index.bin"
+result = weathery.forecast_query(query)
+print(json.dumps({"error": result["error"], "modules": sorted(sys.modules)}))
+"""
+
+
+def run_python(args, code, *argv):
+    cmd = [sys.executable] + args + ["-c", code] + list(argv)
+    return subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def import_time_ms(module: str) -> float:
+    """Cumulative import time of `module` in a fresh interpreter, from -X importtime."""
+    out = run_python(["-X", "importtime"], f"import {module}").stderr
+    for line in out.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].rstrip() == f" {module}":
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"no importtime line for {module}")
+
+
+def loaded_after_import(module: str):
+    out = run_python([], f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))").stdout
+    return json.loads(out)
+
+
+def warm_cache(cache_dir: str) -> str:
+    """Fill cache_dir from a replay server; returns a query that's now fully cached."""
+    import http_client
+    from weather_replay import ReplayServer, pointed_at
+    from bench_weather import synthetic_fixtures
+
+    with tempfile.TemporaryDirectory() as fixtures_dir:
+        query = synthetic_fixtures(fixtures_dir, 1)[0]
+        http_client.configure()
+        with ReplayServer(fixtures_dir) as server, pointed_at(server, cache_dir=cache_dir):
+            import weathery
+            result = weathery.forecast_query(query)
+            if result["error"]:
+                raise RuntimeError(f"couldn't warm the cache: {result['error']}")
+    return query
+
+
+def offenders(modules, lazy):
+    return [m for m in lazy if m in modules]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Weather CLI startup benchmark.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, help="override every import budget")
+    args = parser.parse_args()
+
+    failures = []
+    for module, budget in IMPORT_BUDGET_MS.items():
+        budget = args.budget_ms or budget
+        ms = statistics.median(import_time_ms(module) for _ in range(args.runs))
+        print(f"  import {module:<14}{ms:>8.1f} ms  (budget {budget:.0f} ms)")
+        if ms > budget:
+            failures.append(f"import {module} took {ms:.1f} ms, budget {budget:.0f} ms")
+        eager = offenders(loaded_after_import(module), LAZY_MODULES[module])
+        if eager:
+            failures.append(f"import {module} loads {', '.join(eager)}")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        query = warm_cache(cache_dir)
+        out = json.loads(run_python([], CACHED_LOOKUP, cache_dir, query).stdout)
+    eager = offenders(out["modules"], LAZY_MODULES["cached lookup"])
+    print(f"  cached lookup loads: {', '.join(eager) or 'no network/parsing libraries'}")
+    if out["error"]:
+        failures.append(f"cached lookup failed: {out['error']}")
+    if eager:
+        failures.append(f"a cached lookup loads {', '.join(eager)}")
+
+    if failures:
+        print("\nStartup budget exceeded:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+    print("\nWithin startup budget.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
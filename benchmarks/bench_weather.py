@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for weathery.py and bs4_weather.py
+
+Everything runs against weather_replay.ReplayServer, so no network is needed:
+- recorded fixtures from benchmarks/fixtures/ when there are any
+  (python weather_replay.py record 44512 "Youngstown, OH" ...)
+- otherwise a synthetic fixture set generated into a temp directory
+
+Measures:
+- geocode        ms per cold geocode (Nominatim path, caches empty)
+- get_forecast   ms per cold points + forecast fetch
+- scrape         ms per end-to-end WeatherScraper.scrape_forecast
+- parse          ms per Wunderground page parse (no network at all)
+- batch          queries/second through weathery.run_batch
+
+Usage:
+  python benchmarks/bench_weather.py
+  python benchmarks/bench_weather.py --latency 0.02 --throttle 0.05
+  python benchmarks/bench_weather.py --save-baseline benchmarks/baseline.json
+  python benchmarks/bench_weather.py --baseline benchmarks/baseline.json   # exit 1 on regression
+
+Dependencies: requests, geopy, beautifulsoup4 (lxml optional)
+"""
+
+import io
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import weathery  # noqa: E402
+import http_client  # noqa: E402
+from bs4_weather import WeatherScraper  # noqa: E402
+from weather_replay import ReplayServer, pointed_at, save_fixture, load_fixture, FIXTURES_DIR  # noqa: E402
+from bench_parse import synthetic_page  # noqa: E402
+
+# Lower is better for these; batch throughput is higher-is-better
+LATENCY_METRICS = ("geocode_ms", "get_forecast_ms", "scrape_ms", "parse_ms")
+THROUGHPUT_METRICS = ("batch_qps",)
+
+
+def synthetic_fixtures(fixtures_dir: str, count: int):
+    """Write a believable NWS / Nominatim / Wunderground fixture set for `count` fake ZIPs."""
+    zips = [f"{44500 + i:05d}" for i in range(count)]
+    page = synthetic_page(5000)
+    for i, z in enumerate(zips):
+        lat, lon = 41.0 + i * 0.01, -80.6 - i * 0.01
+        # Several ZIPs share a grid cell, like in real life
+        office_x, office_y = 80 + i // 4, 50
+        forecast_url = f"https://api.weather.gov/gridpoints/CLE/{office_x},{office_y}/forecast"
+        nominatim = [{"lat": str(lat), "lon": str(lon), "display_name": f"Town {i}, Ohio, {z}, United States",
+                      "address": {"postcode": z, "state": "Ohio"}}]
+        save_fixture(fixtures_dir, f"https://nominatim.openstreetmap.org/search?q={z}&format=json&limit=1"
+                     "&addressdetails=1", 200, {"Content-Type": "application/json"}, json.dumps(nominatim).encode())
+        points = {"properties": {"forecast": forecast_url, "gridId": "CLE", "gridX": office_x, "gridY": office_y,
+                                 "relativeLocation": {"properties": {"city": f"Town {i}", "state": "OH"}}}}
+        save_fixture(fixtures_dir, f"https://api.weather.gov/points/{lat:.4f},{lon:.4f}", 200,
+                     {"Content-Type": "application/geo+json"}, json.dumps(points).encode())
+        periods = [{"number": n + 1, "name": f"Period {n + 1}", "isDaytime": n % 2 == 0,
+                    "temperature": 70 - (n % 2) * 15, "temperatureUnit": "F", "windSpeed": "5 to 10 mph",
+                    "windDirection": "SW", "shortForecast": "Partly Cloudy",
+                    "detailedForecast": "Partly cloudy, with a high near 70."} for n in range(14)]
+        save_fixture(fixtures_dir, forecast_url, 200,
+                     {"Content-Type": "application/geo+json", "Cache-Control": "public, max-age=600"},
+                     json.dumps({"properties": {"periods": periods}}).encode())
+        save_fixture(fixtures_dir, f"https://www.wunderground.com/weather/us/zipcode/{z}", 200,
+                     {"Content-Type": "text/html; charset=utf-8"}, page)
+    return zips
+
+
+def recorded_queries(fixtures_dir: str):
+    """ZIPs that have a recorded Nominatim search, so every stage has a fixture."""
+    queries = []
+    for path in glob.glob(os.path.join(fixtures_dir, "*.json")):
+        with open(path, encoding="utf-8") as f:
+            url = json.load(f)["url"]
+        if "nominatim" in url and "q=" in url:
+            query = url.split("q=", 1)[1].split("&", 1)[0]
+            if query.isdigit():
+                queries.append(query)
+    return sorted(queries)
+
+
+@contextlib.contextmanager
+def cold_run(server):
+    """Fresh HTTP client and empty caches, pointed at the replay server."""
+    http_client.configure()
+    with tempfile.TemporaryDirectory() as cache_dir, pointed_at(server, cache_dir=cache_dir):
+        yield
+
+
+def per_call_ms(fn, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) * 1000 / max(1, len(items))
+
+
+def run_suite(server, queries, fixtures_dir: str, batch_size: int) -> dict:
+    results = {}
+    with cold_run(server):
+        results["geocode_ms"] = per_call_ms(weathery.geocode, queries)
+
+    with cold_run(server):
+        coords = [weathery.geocode(q) for q in queries]
+        coords = [c for c in coords if c]
+
+        def fetch(c):
+            points = weathery.get_points_metadata(c[0], c[1])
+            weathery.get_forecast(points["properties"]["forecast"])
+        results["get_forecast_ms"] = per_call_ms(fetch, coords)
+
+    with cold_run(server), contextlib.redirect_stdout(io.StringIO()):
+        scraper = WeatherScraper()
+        results["scrape_ms"] = per_call_ms(scraper.scrape_forecast, queries)
+
+    pages = []
+    for q in queries:
+        found = load_fixture(fixtures_dir, f"{WeatherScraper.BASE_URL}/weather/us/zipcode/{q}")
+        if found and found[0] == 200:
+            pages.append(found[2])
+    results["parse_ms"] = per_call_ms(WeatherScraper().parse_page, pages) if pages else float("nan")
+
+    with cold_run(server):
+        batch = (queries * (batch_size // max(1, len(queries)) + 1))[:batch_size]
+        start = time.perf_counter()
+        for _ in weathery.run_batch(batch):
+            pass
+        results["batch_qps"] = len(batch) / (time.perf_counter() - start)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """List of human-readable regressions beyond tolerance (e.g. 0.25 = 25% worse)."""
+    regressions = []
+    for name in LATENCY_METRICS:
+        if name in baseline and results.get(name, 0) > baseline[name] * (1 + tolerance):
+            regressions.append(f"{name}: {results[name]:.2f} vs baseline {baseline[name]:.2f}")
+    for name in THROUGHPUT_METRICS:
+        if name in baseline and results.get(name, 0) < baseline[name] * (1 - tolerance):
+            regressions.append(f"{name}: {results[name]:.2f} vs baseline {baseline[name]:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline weather scraper benchmarks.")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--synthetic", type=int, default=0, metavar="N",
+                        help="use N synthetic locations even if recorded fixtures exist")
+    parser.add_argument("--latency", type=float, default=0.01, help="simulated upstream latency (s)")
+    parser.add_argument("--throttle", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--baseline", help="compare against this JSON file; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", metavar="FILE")
+    args = parser.parse_args()
+
+    # Measure the pipeline, not the production NWS budget
+    weathery.NWS_RATE, weathery.NWS_BURST = 1000.0, 100
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures_dir = args.fixtures
+        queries = [] if args.synthetic else recorded_queries(fixtures_dir)
+        if not queries:
+            fixtures_dir = tmp
+            queries = synthetic_fixtures(fixtures_dir, args.synthetic or 20)
+        server = ReplayServer(fixtures_dir, latency=args.latency, throttle=args.throttle,
+                              retry_after="0.05", seed=1)
+        with server:
+            results = run_suite(server, queries, fixtures_dir, args.batch_size)
+
+    print(f"{len(queries)} locations, {args.latency * 1000:.0f} ms simulated latency, "
+          f"{args.throttle:.0%} throttled")
+    for name, value in results.items():
+        print(f"  {name:<16}{value:>10.2f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nPerformance regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
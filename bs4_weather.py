@@ -2,65 +2,434 @@
 """
 Weather Underground Web Scraper - Updated Version
 Scrapes 7-day weather forecast from Weather Underground
+
+Every page is first checked for embedded app-state JSON (see embedded_state.py);
+when that has the forecast, no HTML tree is built at all.
+
+Parsing modes:
+- 'fast' (default when lxml is installed): lxml parser, and only the <script>,
+  header and forecast-card subtrees are built into the tree
+- 'full': the whole page with Python's html.parser (the original behavior)
+
+requests and bs4 are imported on first use, so the prompt comes up quickly and a
+page answered from embedded state never loads bs4.
+
+Extraction strategies are tried cheapest-first (embedded state, then script
+JSON, forecast cards, day/temperature text, whole-page fallback on the fast
+tree, then the full tree). Whichever strategy works is remembered per page
+template, keyed by a fingerprint of the page's data-testid markers, and tried
+first for the next page with that fingerprint; --strategy-stats shows hit rates.
+Only the strategy is remembered, not the tree: in fast mode it is still tried on
+the trimmed tree before the full one.
+
+With --stream (stream=True), pages are parsed by an incremental lxml parser as
+they download, and the download stops as soon as the location name and seven
+days of forecast have been seen. Forecast JSON in a <script> replaces any cards
+read before it, but seven complete cards that come before the JSON end the
+download, so on a page carrying both, streaming can report the cards where a
+whole-page parse reports the JSON. A card with no temperature of its own makes
+the page go through the whole-page parse instead (which looks around the card).
+
+Wunderground redirects the guessed /weather/us/{state}/{city} and zipcode URLs
+to a canonical station page. Where each location ended up is kept on disk
+(URL_CACHE_PATH), so later scrapes skip the redirect; an entry is replaced when
+its page redirects again and dropped when it starts to 404.
+
+Every stage (fetch, embedded state, each parse, each extractor) is timed with
+instrumentation.span; --metrics FILE writes the timings on exit and
+--profile cprofile|pyinstrument profiles the whole session.
 """
 
-import requests
-from bs4 import BeautifulSoup
-import sys
+import os
 import re
+import sys
+import html
+import zlib
+import atexit
+import threading
+import argparse
+import instrumentation
+import location_names
+from importlib.util import find_spec
 from urllib.parse import quote
-import json
+from embedded_state import extract_forecast_items
+from forecast_model import ForecastPeriod
+from single_flight import SingleFlight
 
-class WeatherScraper:
+# lxml is only needed as a BeautifulSoup tree builder; don't import it just to check
+HAVE_LXML = find_spec('lxml') is not None
+
+# What the fast parse keeps: everything the extract_* methods look at
+KEEP_TAGS = {'script', 'h1', 'header'}
+KEEP_TESTID_RE = re.compile(r'(Daily|Forecast|CurrentConditions)', re.I)
+KEEP_CLASS_RE = re.compile(r'(daily|forecast|day|location-name|current-conditions)', re.I)
+
+
+def keep_subtree(name, attrs=None):
+    """Should the fast parser build this tag (and everything inside it)?"""
+    if name in KEEP_TAGS:
+        return True
+    if not attrs:
+        return False
+    if not isinstance(attrs, dict):
+        attrs = dict(attrs)
+    testid = attrs.get('data-testid') or ''
+    css = attrs.get('class') or ''
+    if isinstance(css, (list, tuple)):
+        css = ' '.join(css)
+    return bool(KEEP_TESTID_RE.search(testid) or KEEP_CLASS_RE.search(css))
+
+
+def make_fast_filter():
+    """Build the parse_only filter for keep_subtree on whichever bs4 API is installed."""
+    try:
+        from bs4.filter import ElementFilter  # bs4 >= 4.13
+    except ImportError:
+        # Older bs4 calls a callable name rule with (name, attrs)
+        from bs4 import SoupStrainer
+        return SoupStrainer(keep_subtree)
+
+    class SubtreeFilter(ElementFilter):
+        def allow_tag_creation(self, nsprefix, name, attrs):
+            return keep_subtree(name, attrs)
+
+        def allow_string_creation(self, string):
+            # Text inside kept tags is always added; loose page text isn't needed
+            return False
+
+    return SubtreeFilter()
+
+
+_fast_filter = None
+
+
+def fast_filter():
+    """The shared parse_only filter, built (and bs4 imported) on first use."""
+    global _fast_filter
+    if _fast_filter is None:
+        _fast_filter = make_fast_filter()
+    return _fast_filter
+
+# Compiled pattern registry: every extraction heuristic below shares these,
+# so nothing is rebuilt per container or per page.
+DAY_NAMES = ('Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|Today|Tonight|'
+             'Mon|Tue|Wed|Thu|Fri|Sat|Sun')
+CONDITION_KEYWORDS = [
+    'sunny', 'cloudy', 'rain', 'snow', 'storm', 'clear', 'partly', 'mostly', 
+    'thunderstorm', 'showers', 'overcast', 'fog', 'windy', 'fair'
+]
+TEMP_RE = re.compile(r'\d+°')
+CONDITION_RE = re.compile('|'.join(CONDITION_KEYWORDS), re.I)
+FORECAST_HINT_RE = re.compile('forecast', re.I)
+CARD_TESTID_RE = re.compile(r'(DailyWeatherCard|ForecastCard)', re.I)
+CARD_CLASS_RE = re.compile(r'(daily|forecast|day)', re.I)
+H1_RE = re.compile(r'<h1\b[^>]*>(.*?)</h1>', re.I | re.S)
+TAG_RE = re.compile(r'<[^>]+>')
+
+# One alternation for day names, temperatures and condition keywords, so a
+# piece of text is scanned once no matter how many heuristics want it.
+TOKEN_RE = re.compile(
+    rf'(?P<day>\b(?:{DAY_NAMES})\b)|(?P<temp>\b\d+°[CF]?)|(?P<condition>{"|".join(CONDITION_KEYWORDS)})',
+    re.I,
+)
+
+
+def scan_tokens(text):
+    """Single pass over text. Returns (kind, match_text) pairs, kind being day/temp/condition."""
+    return [(m.lastgroup, m.group()) for m in TOKEN_RE.finditer(text)]
+
+
+def scan_strings(strings):
+    """Single pass over a page's (or container's) text nodes.
+
+    Returns a dict with the strings containing a day / temperature / condition.
+    Tokens split across nodes ('<span>72</span>°F') aren't seen here; scan the
+    joined text with scan_tokens for those.
+    """
+    result = {'day_strings': [], 'temp_strings': [], 'condition_strings': []}
+    for string in strings:
+        kinds = {kind for kind, _ in scan_tokens(string)}
+        for kind in kinds:
+            result[kind + '_strings'].append(string)
+    return result
+
+def card_forecast(strings, images=()):
+    """Day, temperatures and condition from one forecast card's text nodes.
+    
+    images is the card's (alt, title) pairs, used when no text names a condition.
+    """
+    forecast = {}
+    
+    # One pass over the container's text finds days, temps and conditions together
+    scan = scan_strings(strings)
+    
+    # Extract day
+    if scan['day_strings']:
+        forecast['day'] = scan['day_strings'][0].strip()
+    
+    # Extract temperatures - look for high/low patterns
+    temps = [temp.strip() for temp in scan['temp_strings'] if temp.strip()]
+    
+    if len(temps) >= 2:
+        # Assume first is high, second is low
+        forecast['temperature'] = f"{temps[0]} / {temps[1]}"
+    elif len(temps) == 1:
+        forecast['temperature'] = temps[0]
+    
+    # Extract condition
+    if scan['condition_strings']:
+        forecast['condition'] = scan['condition_strings'][0].strip()
+    else:
+        # Look for common weather icons or alt text
+        for alt_text, title_text in images:
+            if alt_text and CONDITION_RE.search(alt_text):
+                forecast['condition'] = alt_text
+                break
+            elif title_text and CONDITION_RE.search(title_text):
+                forecast['condition'] = title_text
+                break
+    
+    return forecast
+
+
+class StreamTarget:
+    """lxml parser target that picks the location and forecast out of a page as it arrives
+    
+    Watches the first usable <h1>, <script> bodies with forecast JSON, and forecast
+    cards; done turns true as soon as the location and a whole forecast are in.
+    Script JSON wins over cards seen before it. A card without a temperature
+    needs the parent-element lookup that only the whole-page parse does, so it
+    sets whole_page and done stays false from then on.
+    """
+    
+    def __init__(self, scraper, days=7):
+        self.scraper = scraper
+        self.days = days
+        self.location = None
+        self.forecast = []
+        self.complete = False   # script JSON gave the whole forecast in one go
+        self.whole_page = False  # a card needs parse_page's look around it; don't stop early
+        self.depth = 0
+        self._buffer = []       # text since the last tag, joined into one string per node
+        self._text = None       # (tag, strings) for the <h1> / <script> being read
+        self._card = None       # (depth, strings, images) for the forecast card being read
+    
+    @property
+    def done(self):
+        if self.location is None:
+            return False
+        return self.complete or (not self.whole_page and len(self.forecast) >= self.days)
+    
+    def _flush(self):
+        if self._buffer:
+            string = ''.join(self._buffer)
+            self._buffer = []
+            if self._card is not None:
+                self._card[1].append(string)
+            elif self._text is not None:
+                self._text[1].append(string)
+    
+    def start(self, tag, attrib):
+        self._flush()
+        self.depth += 1
+        if self._card is not None:
+            if tag == 'img':
+                self._card[2].append((attrib.get('alt', ''), attrib.get('title', '')))
+        elif (tag in ('div', 'li') and len(self.forecast) < self.days
+              and CARD_TESTID_RE.search(attrib.get('data-testid', ''))
+              and CARD_CLASS_RE.search(attrib.get('class', ''))):
+            self._card = (self.depth, [], [])
+        elif tag in ('h1', 'script') and self._text is None:
+            self._text = (tag, [])
+    
+    def data(self, text):
+        if self._card is not None or self._text is not None:
+            self._buffer.append(text)
+    
+    def end(self, tag):
+        self._flush()
+        if self._card is not None and self.depth == self._card[0]:
+            forecast = card_forecast(self._card[1], self._card[2])
+            if 'day' in forecast and not self.complete:
+                if 'temperature' not in forecast:
+                    self.whole_page = True
+                self.forecast.append(forecast)
+            self._card = None
+        elif self._text is not None and tag == self._text[0]:
+            text = ''.join(self._text[1])
+            self._text = None
+            if tag == 'h1':
+                name = text.strip()
+                if self.location is None and name and name != 'undefined':
+                    self.location = name
+            elif not self.complete and FORECAST_HINT_RE.search(text):
+                forecast_data = self.scraper.parse_json_forecast(text)
+                if forecast_data:
+                    self.forecast, self.complete = forecast_data, True
+        self.depth -= 1
+    
+    def comment(self, text):
+        pass
+    
+    def close(self):
+        return self.location, self.forecast
+
+# Scrapers in different threads (or coroutines) asking for the same page at the
+# same time share one fetch + parse
+SCRAPE_FLIGHT = SingleFlight('scrape')
+
+STREAM_CHUNK = 16384       # bytes per read when streaming a page
+
+# Where each location's page really lives once Wunderground's redirects settle
+URL_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "weathery", "wu_urls.sqlite")
+URL_CACHE_TTL = 30 * 24 * 3600
+URL_CACHE_MAX_ENTRIES = 10000
+_url_cache = None
+
+
+def get_url_cache():
+    """Return the shared location -> canonical URL cache, opening it on first use"""
+    global _url_cache
+    if _url_cache is None:
+        from weather_cache import SqliteCache
+        _url_cache = SqliteCache(URL_CACHE_PATH, URL_CACHE_TTL, max_entries=URL_CACHE_MAX_ENTRIES)
+    return _url_cache
+
+
+def reset_url_cache():
+    """Close and forget the shared URL cache (e.g. after changing URL_CACHE_PATH)"""
+    global _url_cache
+    if _url_cache is not None:
+        _url_cache.close()
+    _url_cache = None
+
+
+def location_key(location):
+    """Cache key for user input: 'youngstown ohio' and 'Youngstown, OH' share one"""
+    return location_names.canonical_key(location)
+
+# Page fingerprint: the distinct data-testid names on the page (digits dropped),
+# which identify the template without building a tree
+TESTID_RE = re.compile(r'data-testid="([A-Za-z_-]+)')
+
+# Extraction strategies that need a tree, cheapest first, and the method for each
+SOUP_STRATEGIES = {
+    'script_json': 'extract_script_json',
+    'cards': 'extract_cards',
+    'text_pairs': 'extract_text_pairs',
+    'fallback': 'extract_forecast_data_fallback',
+}
+
+
+def page_fingerprint(text):
+    """Cheap structural fingerprint of a page: a hash of its data-testid names"""
+    markers = sorted(set(TESTID_RE.findall(text)))
+    if '__NEXT_DATA__' in text:
+        markers.append('__NEXT_DATA__')
+    return f"{zlib.crc32(' '.join(markers).encode()):08x}"
+
+
+class StrategyMemory:
+    """Which strategy extracted the forecast last time, per page fingerprint
+    
+    The tree it ran on isn't learned, so scrapers in different parse modes can share
+    one memory and a full-tree win never pushes fast mode off the trimmed tree.
+    """
+    
     def __init__(self):
-        self.base_url = "https://www.wunderground.com"
+        self.learned = {}   # fingerprint -> strategy ('embedded' or a SOUP_STRATEGIES name)
+        self.hits = 0       # learned strategy worked straight away
+        self.misses = 0     # learned strategy failed and the full search ran
+        self.cold = 0       # no strategy learned yet for the fingerprint
+        self.wins = {}      # (tree, strategy) -> pages it extracted
+        self._lock = threading.Lock()
+    
+    def get(self, fingerprint):
+        return self.learned.get(fingerprint)
+    
+    def record(self, fingerprint, plan, learned):
+        """Note which plan worked (None if nothing did), given what was learned before"""
+        with self._lock:
+            if learned is None:
+                self.cold += 1
+            elif plan is not None and plan[1] == learned:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if plan is not None:
+                self.learned[fingerprint] = plan[1]
+                self.wins[plan] = self.wins.get(plan, 0) + 1
+    
+    def stats(self):
+        seen = self.hits + self.misses
+        return {
+            'fingerprints': len(self.learned),
+            'hits': self.hits,
+            'misses': self.misses,
+            'cold': self.cold,
+            'hit_rate': self.hits / seen if seen else 0.0,
+            'wins': {f"{tree}:{strategy}": n for (tree, strategy), n in sorted(self.wins.items())},
+        }
+
+
+STRATEGY_MEMORY = StrategyMemory()
+
+class WeatherScraper:
+    BASE_URL = "https://www.wunderground.com"
+    
+    def __init__(self, http=None, parse_mode=None, strategies=None, stream=False, url_cache=None):
+        self.base_url = self.BASE_URL
+        self._http = http
+        self._url_cache = url_cache
+        self.urls_invalidated = 0   # canonical URLs dropped after a 404
+        self.strategies = STRATEGY_MEMORY if strategies is None else strategies
+        if parse_mode is None:
+            parse_mode = 'fast' if HAVE_LXML else 'full'
+        if parse_mode == 'fast' and not HAVE_LXML:
+            raise ValueError("parse_mode='fast' needs lxml (pip install lxml)")
+        if stream and not HAVE_LXML:
+            raise ValueError("stream=True needs lxml (pip install lxml)")
+        self.parse_mode = parse_mode
+        self.stream = stream
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
     
+    @property
+    def http(self):
+        """Shared pooled client so repeated scrapes reuse connections (created on first fetch)"""
+        if self._http is None:
+            from http_client import get_client
+            self._http = get_client()
+        return self._http
+    
+    @property
+    def url_cache(self):
+        """Learned canonical page URLs (the shared on-disk cache unless one was passed in)"""
+        return get_url_cache() if self._url_cache is None else self._url_cache
+    
     def get_location_url(self, location):
         """Convert location input to Weather Underground URL format"""
-        location = location.strip()
+        # ZIP, or city and state however they were typed ('youngstown ohio', 'Youngstown, OH')
+        zip_code, city, state = location_names.parse(location)
+        if zip_code:
+            return f"/weather/us/zipcode/{zip_code}"
         
-        # Check if it's a ZIP code (5 digits)
-        if re.match(r'^\d{5}$', location):
-            return f"/weather/us/zipcode/{location}"
-        
-        # Otherwise, assume it's city, state format
-        location_parts = location.replace(',', '').split()
-        if len(location_parts) >= 2:
-            # Take last part as state, everything else as city
-            state = location_parts[-1].lower()
-            city = '-'.join(location_parts[:-1]).lower()
-            return f"/weather/us/{state}/{city}"
+        if city and state:
+            city = '-'.join(city.lower().split())
+            return f"/weather/us/{state.lower()}/{quote(city)}"
         else:
-            # Single word location
-            location_encoded = quote(location.replace(' ', '-').lower())
+            # No US state in it: a single place name
+            location_encoded = quote('-'.join((city or location.strip()).lower().split()))
             return f"/weather/{location_encoded}"
     
     def scrape_forecast(self, location):
         """Scrape the 7-day forecast from Weather Underground"""
+        import requests
         try:
-            location_path = self.get_location_url(location)
-            url = self.base_url + location_path
-            
-            print(f"Fetching weather data from: {url}")
-            
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract location name
-            location_name = self.extract_location_name(soup)
-            
-            # Try multiple methods to extract forecast data
-            forecast_data = self.extract_forecast_data_v2(soup)
-            
-            if not forecast_data:
-                forecast_data = self.extract_forecast_data_fallback(soup)
-            
-            return location_name, forecast_data
+            # Announced from inside the fetch, so it's the URL really requested
+            # (a learned canonical URL, or the guessed one)
+            return self.fetch_forecast(location, announce=True)
             
         except requests.RequestException as e:
             print(f"Error fetching data: {e}")
@@ -69,6 +438,173 @@ class WeatherScraper:
             print(f"Error parsing weather data: {e}")
             return None, None
     
+    def fetch_forecast(self, location, announce=False):
+        """Like scrape_forecast, but errors propagate to the caller (and quiet unless announce)"""
+        def fetch(url, key):
+            if announce:
+                print(f"Fetching weather data from: {url}")
+            return SCRAPE_FLIGHT.do((url, self.parse_mode, self.stream), self.fetch_and_parse, url, key)
+        return self.fetch_location(location, fetch)
+    
+    def fetch_location(self, location, fetch):
+        """fetch(url, key) for a location's page, going straight to its canonical URL if we know it
+        
+        key is the location's URL-cache key; fetch_page / fetch_streamed use it to learn
+        where redirects end up. A canonical URL that has started to 404 is forgotten
+        and the page is fetched from the guessed URL instead.
+        """
+        from weather_cache import MISSING
+        key = location_key(location)
+        canonical = self.url_cache.get(key)
+        if canonical is not MISSING:
+            import requests
+            try:
+                return fetch(self.absolute_url(canonical), key)
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code != 404:
+                    raise
+                self.url_cache.delete(key)
+                self.urls_invalidated += 1
+        return fetch(self.base_url + self.get_location_url(location), key)
+    
+    def absolute_url(self, url):
+        """Cached URLs are stored relative to base_url when they're on the same site"""
+        return url if '://' in url else self.base_url + url
+    
+    def learn_url(self, key, url, response):
+        """Remember where a redirected request ended up, so the next one goes straight there"""
+        if key is None or not response.history or response.url == url:
+            return
+        final = response.url
+        if final.startswith(self.base_url + '/'):
+            final = final[len(self.base_url):]
+        self.url_cache.set(key, final)
+    
+    def fetch_and_parse(self, url, key=None):
+        """Fetch one forecast page and parse it (no coalescing or error handling)"""
+        if self.stream:
+            return self.fetch_streamed(url, key)
+        return self.parse_page(self.fetch_page(url, key))
+    
+    def fetch_streamed(self, url, key=None):
+        """Parse a page while it downloads, and hang up once the location and forecast are in
+        
+        If the page ends without them, the whole body goes through parse_page as usual.
+        """
+        from lxml import etree
+        target = StreamTarget(self)
+        chunks = []
+        with instrumentation.span('wu_stream'):
+            response = self.http.get(url, headers=self.headers, conditional=False, stream=True)
+            try:
+                response.raise_for_status()
+                self.learn_url(key, url, response)
+                # Same default as parse_page: UTF-8 unless the server names a charset
+                charset = 'charset' in response.headers.get('Content-Type', '').lower()
+                parser = etree.HTMLParser(target=target, encoding=response.encoding if charset else 'utf-8')
+                for chunk in response.iter_content(STREAM_CHUNK):
+                    chunks.append(chunk)
+                    parser.feed(chunk)
+                    if target.done:
+                        break
+            finally:
+                # Closing mid-body drops the connection instead of reading the rest
+                response.close()
+        size = sum(len(chunk) for chunk in chunks)
+        if target.done:
+            instrumentation.observe_size('wu_stream_stopped', size)
+            return target.location, target.forecast
+        instrumentation.observe_size('wu_stream_full', size)
+        return self.parse_page(b''.join(chunks))
+    
+    def fetch_page(self, url, key=None):
+        """Raw bytes of one forecast page; raises on HTTP errors (see learn_url for key)"""
+        with instrumentation.span('wu_fetch'):
+            response = self.http.get(url, headers=self.headers)
+            response.raise_for_status()
+        self.learn_url(key, url, response)
+        instrumentation.observe_size('wu_page', len(response.content))
+        return response.content
+    
+    def scrape_forecast_records(self, location):
+        """Like scrape_forecast, but returns typed ForecastPeriod records"""
+        location_name, forecast_data = self.scrape_forecast(location)
+        return location_name, self.to_records(forecast_data)
+    
+    def to_records(self, forecast_data):
+        """Convert scraped forecast dicts into ForecastPeriod records (numeric highs/lows)"""
+        return [ForecastPeriod.from_scraped(f) for f in forecast_data or []]
+    
+    def parse_page(self, content):
+        """Parse a forecast page (bytes or str) into (location_name, forecast_data)"""
+        text = content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content
+        fingerprint = page_fingerprint(text)
+        learned = self.strategies.get(fingerprint)
+        trees = {}
+        
+        plans = self.plans()
+        if learned is not None:
+            # Same template as a page we've already parsed: try what worked there first,
+            # still on the cheapest tree first
+            plans.sort(key=lambda plan: plan[1] != learned)
+        for plan in plans:
+            location_name, forecast_data = self.try_plan(plan, content, text, trees)
+            if forecast_data:
+                self.strategies.record(fingerprint, plan, learned)
+                return location_name, forecast_data
+        
+        self.strategies.record(fingerprint, None, learned)
+        return "Location", []
+    
+    def plans(self):
+        """Every (tree, strategy) in the order they're tried when nothing's been learned"""
+        trees = ('fast', 'full') if self.parse_mode == 'fast' else ('full',)
+        return [('text', 'embedded')] + [(tree, strategy) for tree in trees for strategy in SOUP_STRATEGIES]
+    
+    def try_plan(self, plan, content, text, trees):
+        """Run one (tree, strategy); trees caches the parsed soups between plans"""
+        tree, strategy = plan
+        if tree == 'text':
+            with instrumentation.span('embedded_state'):
+                forecast_data = self.extract_embedded_state(text)
+            return (self.extract_location_name_text(text) if forecast_data else None), forecast_data
+        
+        soup = trees.get(tree)
+        if soup is None:
+            soup = trees[tree] = self.make_soup(content, tree)
+        with instrumentation.span('extract_' + strategy):
+            forecast_data = getattr(self, SOUP_STRATEGIES[strategy])(soup)
+        if not forecast_data:
+            return None, forecast_data
+        with instrumentation.span('extract_location'):
+            return self.extract_location_name(soup), forecast_data
+    
+    def make_soup(self, content, tree):
+        """'fast' is the trimmed lxml tree; 'full' is the whole page"""
+        from bs4 import BeautifulSoup
+        with instrumentation.span('soup_' + tree):
+            if tree == 'fast':
+                return BeautifulSoup(content, 'lxml', parse_only=fast_filter())
+            # The whole page: lxml when it's installed, else Python's html.parser
+            return BeautifulSoup(content, 'lxml' if self.parse_mode == 'fast' else 'html.parser')
+    
+    def extract_embedded_state(self, text):
+        """Forecast from the page's embedded app-state JSON, without building a DOM"""
+        forecasts = []
+        for item in extract_forecast_items(text):
+            forecast = self.extract_from_json_item(item)
+            if forecast:
+                forecasts.append(forecast)
+        return forecasts
+    
+    def extract_location_name_text(self, text):
+        """Location name from the first <h1> in the raw page, for when we skip the DOM"""
+        for match in H1_RE.finditer(text):
+            name = html.unescape(TAG_RE.sub('', match.group(1))).strip()
+            if name and name != 'undefined':
+                return name
+        return "Location"
+    
     def extract_location_name(self, soup):
         """Extract the location name from the page"""
         # Try multiple selectors for location name
@@ -92,12 +628,24 @@ class WeatherScraper:
     
     def extract_forecast_data_v2(self, soup):
         """Updated method to extract forecast data from current Weather Underground layout"""
-        forecasts = []
-        
         # Look for JSON data in script tags (common in modern websites)
+        forecast_data = self.extract_script_json(soup)
+        if forecast_data:
+            return forecast_data
+        
+        # Look for modern forecast cards
+        forecast_containers = self.find_forecast_cards(soup)
+        if forecast_containers:
+            return self.parse_forecast_cards(forecast_containers)
+        
+        # Look for any containers with temperature patterns
+        return self.extract_text_pairs(soup)
+    
+    def extract_script_json(self, soup):
+        """Forecast from JSON inside <script> tags"""
         scripts = soup.find_all('script')
         for script in scripts:
-            if script.string and 'forecast' in script.string.lower():
+            if script.string and FORECAST_HINT_RE.search(script.string):
                 try:
                     # Try to extract JSON data
                     script_content = script.string
@@ -107,62 +655,47 @@ class WeatherScraper:
                             return forecast_data
                 except:
                     continue
-        
-        # Look for modern forecast cards
+        return []
+    
+    def find_forecast_cards(self, soup):
+        """Forecast card containers, by test id / class, then by looser selectors"""
         forecast_containers = soup.find_all(['div', 'li'], attrs={
-            'data-testid': re.compile(r'(DailyWeatherCard|ForecastCard)', re.I),
-            'class': re.compile(r'(daily|forecast|day)', re.I)
+            'data-testid': CARD_TESTID_RE,
+            'class': CARD_CLASS_RE
         })
         
         if not forecast_containers:
             # Alternative selectors
             forecast_containers = soup.select('[data-testid*="Daily"], [class*="daily"], [class*="forecast"]')
-        
-        if not forecast_containers:
-            # Look for any containers with temperature patterns
-            temp_elements = soup.find_all(string=re.compile(r'\d+°'))
-            day_elements = soup.find_all(string=re.compile(r'(Mon|Tue|Wed|Thu|Fri|Sat|Sun|Today)', re.I))
-            
-            if temp_elements and day_elements:
-                return self.build_forecast_from_elements(day_elements, temp_elements, soup)
-        
-        # Process forecast containers
+        return forecast_containers
+    
+    def extract_cards(self, soup):
+        """Forecast from the page's forecast cards"""
+        return self.parse_forecast_cards(self.find_forecast_cards(soup))
+    
+    def parse_forecast_cards(self, forecast_containers):
+        forecasts = []
         for container in forecast_containers[:7]:
             forecast = self.parse_forecast_container_v2(container)
             if forecast:
                 forecasts.append(forecast)
-        
         return forecasts
     
+    def extract_text_pairs(self, soup):
+        """Forecast from strings holding day names paired with strings holding temperatures"""
+        scan = scan_strings(soup.strings)
+        temp_elements = scan['temp_strings']
+        day_elements = scan['day_strings']
+        
+        if temp_elements and day_elements:
+            return self.build_forecast_from_elements(day_elements, temp_elements, soup)
+        return []
+    
     def parse_json_forecast(self, script_content):
         """Try to extract forecast data from JSON in script tags"""
-        forecasts = []
-        try:
-            # Look for common JSON patterns
-            json_patterns = [
-                r'"dailyForecast":\s*(\[.*?\])',
-                r'"forecast":\s*(\{.*?\})',
-                r'"daily":\s*(\[.*?\])'
-            ]
-            
-            for pattern in json_patterns:
-                match = re.search(pattern, script_content, re.DOTALL)
-                if match:
-                    try:
-                        data = json.loads(match.group(1))
-                        if isinstance(data, list):
-                            for item in data[:7]:
-                                forecast = self.extract_from_json_item(item)
-                                if forecast:
-                                    forecasts.append(forecast)
-                            if forecasts:
-                                return forecasts
-                    except:
-                        continue
-        except:
-            pass
-        
-        return forecasts
+        # Same bracket-balancing extractor as the raw-page path, so arrays with
+        # nested ']' aren't cut short the way a non-greedy regex would
+        return self.extract_embedded_state(script_content)
     
     def extract_from_json_item(self, item):
         """Extract forecast info from JSON item"""
@@ -210,63 +743,24 @@ class WeatherScraper:
     
     def parse_forecast_container_v2(self, container):
         """Enhanced parsing for forecast containers"""
-        forecast = {}
-        
-        # Extract day
-        day_patterns = [
-            r'\b(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|Today|Tonight|Mon|Tue|Wed|Thu|Fri|Sat|Sun)\b'
-        ]
-        
-        for pattern in day_patterns:
-            day_match = container.find(string=re.compile(pattern, re.I))
-            if day_match:
-                forecast['day'] = day_match.strip()
-                break
-        
-        # Extract temperatures - look for high/low patterns
-        temp_elements = container.find_all(string=re.compile(r'\d+°'))
-        temps = [temp.strip() for temp in temp_elements if temp.strip()]
-        
-        if len(temps) >= 2:
-            # Assume first is high, second is low
-            forecast['temperature'] = f"{temps[0]} / {temps[1]}"
-        elif len(temps) == 1:
-            forecast['temperature'] = temps[0]
+        forecast = card_forecast(container.strings, self.image_texts(container))
         
         # If no temps found, look in nearby elements
         if 'temperature' not in forecast:
             parent = container.parent
             if parent:
-                nearby_temps = parent.find_all(string=re.compile(r'\d+°'))
+                nearby_temps = parent.find_all(string=TEMP_RE)
                 nearby_temps = [temp.strip() for temp in nearby_temps if temp.strip()][:2]
                 if nearby_temps:
                     forecast['temperature'] = ' / '.join(nearby_temps)
         
-        # Extract condition
-        condition_keywords = [
-            'sunny', 'cloudy', 'rain', 'snow', 'storm', 'clear', 'partly', 'mostly', 
-            'thunderstorm', 'showers', 'overcast', 'fog', 'windy', 'fair'
-        ]
-        condition_pattern = '|'.join(condition_keywords)
-        
-        condition_elem = container.find(string=re.compile(condition_pattern, re.I))
-        if condition_elem:
-            forecast['condition'] = condition_elem.strip()
-        else:
-            # Look for common weather icons or alt text
-            img_elements = container.find_all('img')
-            for img in img_elements:
-                alt_text = img.get('alt', '')
-                title_text = img.get('title', '')
-                if alt_text and any(keyword in alt_text.lower() for keyword in condition_keywords):
-                    forecast['condition'] = alt_text
-                    break
-                elif title_text and any(keyword in title_text.lower() for keyword in condition_keywords):
-                    forecast['condition'] = title_text
-                    break
-        
         return forecast if 'day' in forecast else None
     
+    def image_texts(self, container):
+        """(alt, title) of each image in a container, looked up only if someone asks"""
+        for img in container.find_all('img'):
+            yield img.get('alt', ''), img.get('title', '')
+    
     def build_forecast_from_elements(self, day_elements, temp_elements, soup):
         """Build forecast from separate day and temperature elements"""
         forecasts = []
@@ -282,7 +776,7 @@ class WeatherScraper:
         
         for temp_elem in temp_elements:
             temp_text = temp_elem.strip()
-            if re.match(r'\d+°', temp_text):
+            if TEMP_RE.match(temp_text):
                 temps.append(temp_text)
         
         # Pair days with temperatures
@@ -310,16 +804,14 @@ class WeatherScraper:
         """Fallback method using broader search"""
         forecasts = []
         
-        # Get all text content and search for patterns
-        page_text = soup.get_text()
-        
-        # Find day patterns
-        day_pattern = r'\b(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|Today|Tonight|Mon|Tue|Wed|Thu|Fri|Sat|Sun)\b'
-        days = re.findall(day_pattern, page_text, re.I)
-        
-        # Find temperature patterns
-        temp_pattern = r'\b\d+°[CF]?\b'
-        temperatures = re.findall(temp_pattern, page_text)
+        # Day and temperature tokens from the page's joined text, in one TOKEN_RE pass.
+        # Joined, not node by node, so '<span>72</span>°F' still reads as 72°F.
+        days, temperatures = [], []
+        for kind, token in scan_tokens(soup.get_text()):
+            if kind == 'day':
+                days.append(token)
+            elif kind == 'temp':
+                temperatures.append(token)
         
         if days and temperatures:
             # Create forecast entries
@@ -371,12 +863,34 @@ class WeatherScraper:
             print(f"Conditions: {condition}")
             print("-" * 40)
 
-def main():
+def print_strategy_stats():
+    stats = STRATEGY_MEMORY.stats()
+    print(f"Extraction strategies: {stats['fingerprints']} page templates learned, "
+          f"{stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)", file=sys.stderr)
+    for plan, wins in stats['wins'].items():
+        print(f"  {plan:<24}{wins:>6} pages", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Interactive Weather Underground forecast scraper.")
+    parser.add_argument("--parse-mode", choices=("fast", "full"), help="HTML parsing mode (default: fast with lxml)")
+    parser.add_argument("--stream", action="store_true",
+                        help="parse pages as they download and stop once the forecast is in (needs lxml)")
+    parser.add_argument("--strategy-stats", action="store_true",
+                        help="print which extraction strategies worked, and how often the learned one did, on exit")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.strategy_stats:
+        atexit.register(print_strategy_stats)
+    if args.metrics:
+        atexit.register(instrumentation.write_metrics, args.metrics)
+    with instrumentation.profiled(args.profile, args.profile_out):
+        interactive(WeatherScraper(parse_mode=args.parse_mode, stream=args.stream))
+
+
+def interactive(scraper):
     print("Weather Underground Forecast Scraper")
     print("=====================================")
     
-    scraper = WeatherScraper()
-    
     while True:
         try:
             location = input("\nEnter ZIP code or City, State (or 'quit' to exit): ").strip()
@@ -405,4 +919,4 @@ def main():
             print(f"An error occurred: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
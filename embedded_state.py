@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Pull forecast days out of a page's embedded app-state JSON without parsing it all
+- Finds the state blob (Angular transfer state, __NEXT_DATA__, window.__X__ = ...)
+  straight in the raw HTML text, so no DOM is built
+- A bracket-balancing scanner walks to the forecast array, then decodes it one
+  element at a time; the full state object is never loaded with json.loads
+- Handles both shapes we see:
+    list of day objects:  "dailyForecast": [{"dayOfWeek": ..., "high": ...}, ...]
+    columnar (TWC v3):    {"dayOfWeek": [...], "temperatureMax": [...], ...}
+- Works on Angular's escaped transfer state (&q; for ", &a; for &, ...) too
+
+Only uses the standard library.
+"""
+
+import re
+import json
+
+# Where the state blob starts. Anything else on the page is skipped.
+STATE_MARKERS = [
+    re.compile(r'<script[^>]*\bid=["\']app-root-state["\'][^>]*>', re.I),
+    re.compile(r'<script[^>]*\bid=["\']__NEXT_DATA__["\'][^>]*>', re.I),
+    re.compile(r'window\.__[A-Za-z_]+__\s*=\s*'),
+]
+SCRIPT_END = "</script>"
+
+# Arrays of per-day objects, most specific key first
+LIST_KEYS = ("dailyForecast", "daily")
+# Columnar daily forecast: parallel arrays, one entry per day
+COLUMN_KEYS = {"high": "temperatureMax", "low": "temperatureMin", "narrative": "narrative"}
+COLUMN_WINDOW = 50000  # how far before dayOfWeek to look for sibling columns
+
+# Angular TransferState escaping (& has to be last)
+ESCAPES = [("&q;", '"'), ("&s;", "'"), ("&l;", "<"), ("&g;", ">"), ("&a;", "&")]
+
+_TOKEN_RES = {
+    '"': re.compile(r'[{}\[\]"\\]'),
+    "&q;": re.compile(r'&q;|[{}\[\]\\]'),
+}
+_SCALAR_END_RE = re.compile(r"[,\]}\s]")
+_SEPARATOR_RE = re.compile(r"[\s,]*")
+_key_re_cache = {}
+
+
+def unescape(text: str, quote: str) -> str:
+    if quote == '"':
+        return text
+    for escaped, plain in ESCAPES:
+        text = text.replace(escaped, plain)
+    return text
+
+
+def key_re(key: str, quote: str):
+    """Compiled pattern for `"key": [` in the given quoting style."""
+    cache_key = (key, quote)
+    if cache_key not in _key_re_cache:
+        q = re.escape(quote)
+        _key_re_cache[cache_key] = re.compile(rf"{q}{re.escape(key)}{q}\s*:\s*\[")
+    return _key_re_cache[cache_key]
+
+
+def find_state_region(html: str):
+    """Return (start, end) of the app-state blob, or the whole text if there is no marker."""
+    for marker in STATE_MARKERS:
+        m = marker.search(html)
+        if m:
+            end = html.find(SCRIPT_END, m.end())
+            return m.end(), (end if end != -1 else len(html))
+    return 0, len(html)
+
+
+def detect_quote(html: str, start: int, end: int) -> str:
+    """Angular escapes every quote in its transfer state; plain JSON doesn't."""
+    amp = html.find("&q;", start, min(end, start + 2000))
+    plain = html.find('"', start, min(end, start + 2000))
+    if amp != -1 and (plain == -1 or amp < plain):
+        return "&q;"
+    return '"'
+
+
+def walk_brackets(text: str, pos: int, end: int, quote: str):
+    """Yield (bracket, index) for every bracket in text[pos:end] that isn't inside a string."""
+    token_re = _TOKEN_RES[quote]
+    in_string = False
+    while True:
+        m = token_re.search(text, pos, end)
+        if not m:
+            return
+        tok = m.group()
+        pos = m.end()
+        if in_string:
+            if tok == "\\":
+                # skip whatever is escaped, including an escaped quote token
+                pos += len(quote) if text.startswith(quote, pos) else 1
+            elif tok == quote:
+                in_string = False
+        elif tok == quote:
+            in_string = True
+        elif tok != "\\":
+            yield tok, m.start()
+
+
+def find_close(text: str, pos: int, end: int, quote: str):
+    """From just inside a container, return the index of its closing bracket (or None)."""
+    depth = 0
+    for tok, index in walk_brackets(text, pos, end, quote):
+        if tok in "{[":
+            depth += 1
+        else:
+            depth -= 1
+            if depth < 0:
+                return index
+    return None
+
+
+def element_end(text: str, pos: int, end: int, quote: str):
+    """End index (exclusive) of the JSON value starting at pos."""
+    ch = text[pos]
+    if ch in "{[":
+        close = find_close(text, pos + 1, end, quote)
+        return None if close is None else close + 1
+    if text.startswith(quote, pos):
+        # a string: find its closing quote, honoring backslash escapes
+        i = pos + len(quote)
+        while i < end:
+            if text[i] == "\\":
+                i += len(quote) if text.startswith(quote, i + 1) else 1
+                i += 1
+            elif text.startswith(quote, i):
+                return i + len(quote)
+            else:
+                i += 1
+        return None
+    # number / true / false / null
+    m = _SCALAR_END_RE.search(text, pos, end)
+    return m.start() if m else end
+
+
+def iter_array(text: str, pos: int, end: int, quote: str, limit: int = None):
+    """Decode the array whose '[' is just before pos, one element at a time."""
+    count = 0
+    while pos < end and (limit is None or count < limit):
+        pos = _SEPARATOR_RE.match(text, pos).end()
+        if pos >= end or text[pos] == "]":
+            return
+        stop = element_end(text, pos, end, quote)
+        if stop is None:
+            return
+        yield json.loads(unescape(text[pos:stop], quote))
+        count += 1
+        pos = stop
+
+
+def same_object(text: str, a: int, b: int, quote: str) -> bool:
+    """True if positions a < b sit at the same nesting level of one object."""
+    depth = 0
+    for tok, _ in walk_brackets(text, a, b, quote):
+        depth += 1 if tok in "{[" else -1
+        if depth < 0:
+            return False
+    return depth == 0
+
+
+def find_column(text: str, key: str, anchor: int, lo: int, hi: int, quote: str):
+    """Locate the sibling array `key` of the column at `anchor`. Returns the index after '['."""
+    m = key_re(key, quote).search(text, anchor, hi)
+    if m:
+        return m.end()
+    # Not after the anchor; try the nearest occurrence before it, if it's a true sibling
+    last = None
+    for m in key_re(key, quote).finditer(text, max(lo, anchor - COLUMN_WINDOW), anchor):
+        last = m
+    if last and same_object(text, last.start(), anchor, quote):
+        return last.end()
+    return None
+
+
+def list_items(html: str, start: int, end: int, quote: str, limit: int):
+    """Per-day objects from the first list-shaped forecast key that has any dicts."""
+    for key in LIST_KEYS:
+        for m in key_re(key, quote).finditer(html, start, end):
+            items = [item for item in iter_array(html, m.end(), end, quote, limit) if isinstance(item, dict)]
+            if items:
+                return items
+    return []
+
+
+def column_items(html: str, start: int, end: int, quote: str, limit: int):
+    """Per-day dicts zipped together from a columnar (dayOfWeek/temperatureMax/...) forecast."""
+    m = key_re("dayOfWeek", quote).search(html, start, end)
+    if not m:
+        return []
+    days = list(iter_array(html, m.end(), end, quote, limit))
+    close = find_close(html, m.end(), end, quote)
+    # The enclosing object ends at the first unmatched '}' after the dayOfWeek array
+    obj_end = find_close(html, close + 1, end, quote) if close is not None else None
+    obj_end = obj_end if obj_end is not None else end
+
+    columns = {}
+    for name, key in COLUMN_KEYS.items():
+        pos = find_column(html, key, m.start(), start, obj_end, quote)
+        columns[name] = list(iter_array(html, pos, obj_end, quote, limit)) if pos is not None else []
+    # daypart holds two entries per day (day, night); prefer the daytime phrase
+    phrases = []
+    pos = find_column(html, "wxPhraseLong", m.start(), start, obj_end, quote)
+    if pos is not None:
+        phrases = list(iter_array(html, pos, obj_end, quote, limit * 2 if limit else None))
+
+    items = []
+    for i, day in enumerate(days):
+        item = {"dayOfWeek": day}
+        for name in ("high", "low"):
+            if i < len(columns[name]) and columns[name][i] is not None:
+                item[name] = columns[name][i]
+        phrase = next((p for p in phrases[2 * i:2 * i + 2] if p), None)
+        if phrase:
+            item["condition"] = phrase
+        elif i < len(columns["narrative"]) and columns["narrative"][i]:
+            item["description"] = columns["narrative"][i]
+        items.append(item)
+    return items
+
+
+def extract_forecast_items(html: str, limit: int = 7):
+    """Return up to `limit` raw per-day dicts from the page's embedded state ([] if none)."""
+    start, end = find_state_region(html)
+    quote = detect_quote(html, start, end)
+    try:
+        return (list_items(html, start, end, quote, limit)
+                or column_items(html, start, end, quote, limit))
+    except (ValueError, IndexError):
+        # Truncated or malformed blob: let the HTML heuristics have a go
+        return []
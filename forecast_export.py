@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Machine-readable forecast output for bulk runs
+- NDJSON: one JSON object per forecast period
+- CSV: one row per period, with a header
+- Parquet / Arrow IPC: columnar files written one row group / record batch at a time
+
+Every sink buffers rows and writes them in batches, so memory stays bounded and
+there's one write call per batch instead of one print per line. Rows are
+(location, ForecastPeriod) with the columns in COLUMNS.
+
+  with open_sink("forecasts.parquet") as sink:
+      sink.write("Youngstown, OH", records)
+
+Dependencies: none for NDJSON/CSV; pyarrow for Parquet/Arrow
+  pip install pyarrow
+"""
+
+import io
+import os
+import sys
+import csv
+import json
+import math
+from forecast_model import FIELD_NAMES, CODE_NAMES, ForecastBatch
+
+COLUMNS = ["location"] + FIELD_NAMES
+BATCH_ROWS = 10000            # rows buffered before a text sink writes them out
+COLUMNAR_BATCH_ROWS = 100000  # rows per Parquet row group / Arrow record batch
+FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv",
+           ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+
+def period_row(location: str, period) -> list:
+    """Values for one period in COLUMNS order (times as ISO 8601 strings)."""
+    row = [location]
+    for name in FIELD_NAMES:
+        value = getattr(period, name)
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        elif isinstance(value, float) and math.isnan(value):
+            value = None
+        row.append(value)
+    return row
+
+
+class Sink:
+    """Base class: buffer rows, write them out batch_rows at a time."""
+
+    def __init__(self, out, batch_rows: int = BATCH_ROWS):
+        if out == "-":
+            self.file, self._owns_file = sys.stdout, False
+        elif isinstance(out, (str, os.PathLike)):
+            self.file, self._owns_file = self._open(out), True
+        else:
+            self.file, self._owns_file = out, False
+        self.batch_rows = batch_rows
+        self.rows = 0      # rows written so far
+        self._buffer = []
+
+    def _open(self, path):
+        return open(path, "w", encoding="utf-8", newline="")
+
+    def write(self, location: str, periods):
+        """Queue one location's periods; writes happen whenever a batch fills up."""
+        for period in periods:
+            self._buffer.append(period_row(location, period))
+            if len(self._buffer) >= self.batch_rows:
+                self.flush()
+
+    def write_batch(self, batch: ForecastBatch):
+        for location, period in batch:
+            self._buffer.append(period_row(location, period))
+            if len(self._buffer) >= self.batch_rows:
+                self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._write_rows(self._buffer)
+            self.rows += len(self._buffer)
+            self._buffer = []
+
+    def _write_rows(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+        if self._owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class NdjsonSink(Sink):
+    def _write_rows(self, rows):
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        self.file.write("".join(dumps(dict(zip(COLUMNS, row))) + "\n" for row in rows))
+
+
+class CsvSink(Sink):
+    def __init__(self, out, batch_rows: int = BATCH_ROWS):
+        super().__init__(out, batch_rows)
+        csv.writer(self.file).writerow(COLUMNS)
+
+    def _write_rows(self, rows):
+        # csv.writer writes field by field, so render the batch in memory first
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        self.file.write(buf.getvalue())
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ValueError("Parquet/Arrow output needs pyarrow (pip install pyarrow)") from None
+
+
+class ColumnarSink(Sink):
+    """Buffers into a ForecastBatch and hands whole columns to pyarrow."""
+
+    def __init__(self, path, batch_rows: int = COLUMNAR_BATCH_ROWS):
+        _require_pyarrow()
+        import pyarrow as pa
+        self.pa = pa
+        self.schema = pa.schema([
+            ("location", pa.string()),
+            ("name", pa.string()),
+            ("high", pa.float64()),
+            ("low", pa.float64()),
+            ("unit", pa.string()),
+            ("wind_speed", pa.float64()),
+            ("wind_direction", pa.string()),
+            ("condition", pa.string()),
+            ("condition_code", pa.string()),
+            ("start_time", pa.timestamp("us", tz="UTC")),
+            ("end_time", pa.timestamp("us", tz="UTC")),
+            ("detail", pa.string()),
+        ])
+        self.path = path
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self._batch = ForecastBatch()
+        self._writer = None
+
+    def write(self, location: str, periods):
+        for period in periods:
+            self._batch.append(location, period)
+            if len(self._batch) >= self.batch_rows:
+                self.flush()
+
+    def write_batch(self, batch: ForecastBatch):
+        self.flush()
+        self._write_table(self.table(batch))
+        self.rows += len(batch)
+
+    def _floats(self, column):
+        """array('d') -> float64 column without copying, NaN as null."""
+        pa = self.pa
+        import pyarrow.compute as pc
+        values = pa.Array.from_buffers(pa.float64(), len(column), [None, pa.py_buffer(column)])
+        return pc.if_else(pc.is_nan(values), pa.scalar(None, pa.float64()), values)
+
+    def _times(self, column):
+        """array('d') of POSIX seconds -> UTC microsecond timestamps."""
+        pa = self.pa
+        import pyarrow.compute as pc
+        micros = pc.cast(pc.multiply(self._floats(column), 1e6), pa.int64(), safe=False)
+        return micros.cast(pa.timestamp("us", tz="UTC"))
+
+    def _codes(self, indexes, names, index_type):
+        pa = self.pa
+        idx = pa.Array.from_buffers(index_type, len(indexes), [None, pa.py_buffer(indexes)])
+        return pa.array(names, pa.string()).take(idx)
+
+    def table(self, batch: ForecastBatch):
+        pa = self.pa
+        columns = [
+            self._codes(batch.location, batch.locations, pa.uint32()),
+            pa.array(batch.name, pa.string()),
+            self._floats(batch.high),
+            self._floats(batch.low),
+            self._codes(batch.unit, [chr(i) for i in range(256)], pa.uint8()),
+            self._floats(batch.wind_speed),
+            pa.array(batch.wind_direction, pa.string()),
+            pa.array(batch.condition, pa.string()),
+            self._codes(batch.code, CODE_NAMES, pa.uint16()),
+            self._times(batch.start_time),
+            self._times(batch.end_time),
+            pa.array(batch.detail, pa.string()),
+        ]
+        return pa.Table.from_arrays(columns, schema=self.schema)
+
+    def flush(self):
+        if len(self._batch):
+            self._write_table(self.table(self._batch))
+            self.rows += len(self._batch)
+            self._batch = ForecastBatch()
+
+    def close(self):
+        self.flush()
+        if self._writer is None:
+            # Nothing written: still leave a valid, empty file behind
+            self._write_table(self.schema.empty_table())
+        self._writer.close()
+
+
+class ParquetSink(ColumnarSink):
+    def _write_table(self, table):
+        import pyarrow.parquet as pq
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, self.schema)
+        self._writer.write_table(table)
+
+
+class ArrowSink(ColumnarSink):
+    """Arrow IPC file (what pyarrow.feather / pandas.read_feather read)."""
+
+    def _write_table(self, table):
+        if self._writer is None:
+            self._writer = self.pa.ipc.new_file(self.path, self.schema)
+        self._writer.write_table(table)
+
+
+SINKS = {"ndjson": NdjsonSink, "csv": CsvSink, "parquet": ParquetSink, "arrow": ArrowSink}
+
+
+def open_sink(path: str, fmt: str = None, **kwargs) -> Sink:
+    """Sink for path ('-' = stdout), with the format taken from fmt or the file extension."""
+    if fmt is None:
+        fmt = FORMATS.get(os.path.splitext(path)[1].lower(), "ndjson")
+    if fmt not in SINKS:
+        raise ValueError(f"unknown output format {fmt!r} (choose from {', '.join(SINKS)})")
+    if fmt in ("parquet", "arrow") and path == "-":
+        raise ValueError(f"{fmt} output needs a file path, not stdout")
+    return SINKS[fmt](path, **kwargs)
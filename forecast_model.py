@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Shared forecast record model for weathery.py (NWS) and bs4_weather.py (Wunderground)
+- ForecastPeriod: one compact, slotted record with numeric temperatures and wind
+- ForecastBatch: column-oriented container for many locations' periods, backed by
+  array('d') / array('H') instead of one dict per period
+
+Only uses the standard library.
+"""
+
+import re
+import math
+from array import array
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Optional
+
+# Condition codes, first match wins (so "thunderstorm" beats "rain")
+CONDITION_CODES = [
+    ("tstorm", re.compile(r"thunder|t-storm|tstorm", re.I)),
+    ("snow", re.compile(r"snow|flurr|blizzard|sleet|ice|freezing", re.I)),
+    ("rain", re.compile(r"rain|shower|drizzle", re.I)),
+    ("fog", re.compile(r"fog|haze|smoke|mist", re.I)),
+    ("wind", re.compile(r"wind|breezy|blustery", re.I)),
+    ("mostly_cloudy", re.compile(r"mostly cloudy|considerable cloud", re.I)),
+    ("partly_cloudy", re.compile(r"partly|mostly sunny|mostly clear|few clouds", re.I)),
+    ("cloudy", re.compile(r"cloudy|overcast", re.I)),
+    ("clear", re.compile(r"sunny|clear|fair", re.I)),
+]
+UNKNOWN_CODE = "unknown"
+CODE_NAMES = [code for code, _ in CONDITION_CODES] + [UNKNOWN_CODE]
+CODE_INDEX = {code: i for i, code in enumerate(CODE_NAMES)}
+
+TEMP_RE = re.compile(r"(-?\d+(?:\.\d+)?)\s*°?\s*([CF])?", re.I)
+WIND_RE = re.compile(r"(\d+(?:\.\d+)?)")
+
+
+def condition_code(text: str) -> str:
+    """Map free-text conditions ("Chance Showers And Thunderstorms") to a short code."""
+    if not text:
+        return UNKNOWN_CODE
+    for code, pattern in CONDITION_CODES:
+        if pattern.search(text):
+            return code
+    return UNKNOWN_CODE
+
+
+def parse_wind_speed(text) -> Optional[float]:
+    """'10 mph' -> 10.0, '5 to 15 mph' -> 15.0 (the upper bound), None if there's no number."""
+    if isinstance(text, (int, float)):
+        return float(text)
+    numbers = WIND_RE.findall(text or "")
+    return float(numbers[-1]) if numbers else None
+
+
+def parse_time(text) -> Optional[datetime]:
+    if not text:
+        return None
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return None
+
+
+def parse_temperatures(text: str):
+    """'72° / 55°' -> (72.0, 55.0, 'F'); '72°C' -> (72.0, None, 'C'); 'N/A' -> (None, None, 'F')."""
+    found = TEMP_RE.findall(text or "")
+    unit = next((u.upper() for _, u in found if u), "F")
+    values = [float(v) for v, _ in found]
+    high = values[0] if values else None
+    low = values[1] if len(values) > 1 else None
+    return high, low, unit
+
+
+@dataclass(slots=True)
+class ForecastPeriod:
+    name: str
+    high: Optional[float] = None
+    low: Optional[float] = None
+    unit: str = "F"
+    wind_speed: Optional[float] = None   # mph, upper bound when given as a range
+    wind_direction: str = ""
+    condition: str = ""
+    condition_code: str = UNKNOWN_CODE
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    detail: str = ""
+
+    @classmethod
+    def from_nws(cls, period: dict) -> "ForecastPeriod":
+        """Build from one NWS /forecast period. Daytime temps are highs, nighttime temps are lows."""
+        temp = period.get("temperature")
+        if isinstance(temp, dict):  # newer NWS responses use a QuantitativeValue
+            temp = temp.get("value")
+        temp = float(temp) if temp is not None else None
+        daytime = period.get("isDaytime", True)
+        short = period.get("shortForecast") or ""
+        return cls(
+            name=period.get("name", "Period"),
+            high=temp if daytime else None,
+            low=None if daytime else temp,
+            unit=period.get("temperatureUnit") or "F",
+            wind_speed=parse_wind_speed(period.get("windSpeed")),
+            wind_direction=period.get("windDirection") or "",
+            condition=short,
+            condition_code=condition_code(short),
+            start_time=parse_time(period.get("startTime")),
+            end_time=parse_time(period.get("endTime")),
+            detail=period.get("detailedForecast") or "",
+        )
+
+    @classmethod
+    def from_scraped(cls, forecast: dict) -> "ForecastPeriod":
+        """Build from a WeatherScraper forecast dict ({'day', 'temperature', 'condition'})."""
+        high, low, unit = parse_temperatures(forecast.get("temperature", ""))
+        condition = forecast.get("condition") or ""
+        return cls(
+            name=forecast.get("day", "Period"),
+            high=high,
+            low=low,
+            unit=unit,
+            condition=condition,
+            condition_code=condition_code(condition),
+        )
+
+
+FIELD_NAMES = [f.name for f in fields(ForecastPeriod)]
+
+
+def _num(value) -> float:
+    return math.nan if value is None else value
+
+
+def _opt(value) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+class ForecastBatch:
+    """Columnar storage for many locations' forecast periods.
+
+    Numbers and timestamps live in typed arrays (NaN = missing), condition codes and
+    location labels are small integer indexes, so a million periods stay compact.
+    """
+
+    def __init__(self):
+        self.locations = []          # distinct location labels
+        self._location_index = {}
+        self.location = array("I")   # per-row index into self.locations
+        self.high = array("d")
+        self.low = array("d")
+        self.wind_speed = array("d")
+        self.start_time = array("d")  # POSIX timestamps
+        self.end_time = array("d")
+        self.code = array("H")        # per-row index into CODE_NAMES
+        self.unit = array("B")        # ord() of 'F' / 'C'
+        self.name = []
+        self.wind_direction = []
+        self.condition = []
+        self.detail = []
+
+    def __len__(self):
+        return len(self.high)
+
+    def _location_id(self, label: str) -> int:
+        idx = self._location_index.get(label)
+        if idx is None:
+            idx = self._location_index[label] = len(self.locations)
+            self.locations.append(label)
+        return idx
+
+    def append(self, location: str, period: ForecastPeriod):
+        self.location.append(self._location_id(location))
+        self.high.append(_num(period.high))
+        self.low.append(_num(period.low))
+        self.wind_speed.append(_num(period.wind_speed))
+        self.start_time.append(period.start_time.timestamp() if period.start_time else math.nan)
+        self.end_time.append(period.end_time.timestamp() if period.end_time else math.nan)
+        self.code.append(CODE_INDEX.get(period.condition_code, CODE_INDEX[UNKNOWN_CODE]))
+        self.unit.append(ord((period.unit or "F")[0]))
+        self.name.append(period.name)
+        self.wind_direction.append(period.wind_direction)
+        self.condition.append(period.condition)
+        self.detail.append(period.detail)
+
+    def extend(self, location: str, periods):
+        for period in periods:
+            self.append(location, period)
+
+    def row(self, i: int):
+        """(location, ForecastPeriod) for row i, rebuilt from the columns."""
+        start, end = self.start_time[i], self.end_time[i]
+        return self.locations[self.location[i]], ForecastPeriod(
+            name=self.name[i],
+            high=_opt(self.high[i]),
+            low=_opt(self.low[i]),
+            unit=chr(self.unit[i]),
+            wind_speed=_opt(self.wind_speed[i]),
+            wind_direction=self.wind_direction[i],
+            condition=self.condition[i],
+            condition_code=CODE_NAMES[self.code[i]],
+            start_time=None if math.isnan(start) else datetime.fromtimestamp(start).astimezone(),
+            end_time=None if math.isnan(end) else datetime.fromtimestamp(end).astimezone(),
+            detail=self.detail[i],
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def for_location(self, location: str):
+        """Row indexes belonging to one location."""
+        idx = self._location_index.get(location)
+        return [i for i, loc in enumerate(self.location) if loc == idx]
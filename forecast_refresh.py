@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Incremental forecast refresh for a watched set of locations
+- Each location is resolved to its NWS grid cell once; locations that share a
+  cell share one refresh
+- Every cell's last forecast is stored with NWS's updateTime / generatedAt and
+  the Expires time from the response's caching headers
+- A heap ordered by next expiry decides what to refresh; nothing is fetched
+  before its data expires
+- Only changes go downstream: periods that are new or different, and periods
+  that dropped off the front of the forecast. An unchanged updateTime emits nothing.
+
+Watch a list and print diffs as NDJSON:
+  python forecast_refresh.py zips.txt
+  python forecast_refresh.py zips.txt --once     # one pass over whatever is due
+
+Dependencies: requests, geopy (via weathery.py)
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import argparse
+import itertools
+import threading
+import weathery
+from weather_cache import SqliteCache, MISSING
+
+STATE_PATH = os.path.join(weathery.CACHE_DIR, "refresh.sqlite")
+STATE_TTL = 14 * 24 * 3600     # forget cells nobody has refreshed in two weeks
+MIN_INTERVAL = 60              # never refetch a cell more often than this (seconds)
+RETRY_INTERVAL = 300           # after a failed refresh
+# Fields that make a period "different"; 'number' shifts as periods roll off, so skip it
+DIFF_FIELDS = ("name", "isDaytime", "temperature", "temperatureUnit", "probabilityOfPrecipitation",
+               "windSpeed", "windDirection", "shortForecast", "detailedForecast")
+
+
+def period_key(period: dict) -> str:
+    return period.get("startTime") or period.get("name", "")
+
+
+def diff_periods(old, new):
+    """(changed, removed): periods in new that are new or differ, and keys only in old."""
+    before = {period_key(p): p for p in old or []}
+    changed = []
+    for p in new:
+        prev = before.pop(period_key(p), None)
+        if prev is None or any(prev.get(f) != p.get(f) for f in DIFF_FIELDS):
+            changed.append(p)
+    return changed, list(before)
+
+
+class RefreshScheduler:
+    def __init__(self, state_path: str = STATE_PATH, emit=None):
+        """emit(diff) is called for every location whose forecast changed."""
+        self.state = SqliteCache(state_path, STATE_TTL)
+        self.emit = emit or (lambda diff: print(json.dumps(diff), flush=True))
+        self.cells = {}       # cell key -> {"url": forecast URL, "watchers": {query: location}}
+        self._heap = []       # (due, seq, cell key)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.unchanged = 0
+        self.failures = 0
+        self.diffs = 0
+
+    def watch(self, query: str) -> bool:
+        """Add a location. Returns False if it can't be resolved to an NWS grid cell."""
+        geocoded = weathery.geocode(query)
+        points = weathery.get_points_metadata(*geocoded[:2]) if geocoded else None
+        url = (points or {}).get("properties", {}).get("forecast")
+        if not url:
+            return False
+        key = weathery.grid_cell_key(url)
+        location = weathery.pretty_location(points, geocoded[2])
+        with self._lock:
+            cell = self.cells.get(key)
+            if cell is None:
+                cell = self.cells[key] = {"url": url, "watchers": {}}
+                stored = self.state.get(key)
+                # Pick up where the last run left off: not due until the stored copy expires
+                due = stored["expires"] if stored is not MISSING else 0
+                heapq.heappush(self._heap, (due, next(self._seq), key))
+            cell["watchers"][query] = location
+        return True
+
+    def next_due(self):
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def refresh_cell(self, key: str):
+        """Refetch one cell and emit a diff per watcher if anything changed. Returns next due time."""
+        cell = self.cells[key]
+        now = time.time()
+        update = weathery.fetch_forecast_update(cell["url"], key)
+        self.refreshes += 1
+        if update is None:
+            self.failures += 1
+            return now + RETRY_INTERVAL
+
+        stored = self.state.get(key)
+        stored = None if stored is MISSING else stored
+        if stored and stored["update_time"] and stored["update_time"] == update["update_time"]:
+            self.unchanged += 1
+            changed, removed = [], []
+        else:
+            changed, removed = diff_periods(stored["periods"] if stored else None, update["periods"])
+        self.state.set(key, update)
+
+        if changed or removed:
+            for query, location in list(cell["watchers"].items()):
+                self.diffs += 1
+                self.emit({
+                    "query": query,
+                    "location": location,
+                    "update_time": update["update_time"],
+                    "generated_at": update["generated_at"],
+                    "changed": changed,
+                    "removed": removed,
+                })
+        return max(update["expires"], now + MIN_INTERVAL)
+
+    def run_due(self, now: float = None) -> int:
+        """Refresh every cell whose data has expired (once each). Returns how many were refreshed."""
+        now = time.time() if now is None else now
+        due_keys = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due_keys.append(heapq.heappop(self._heap)[2])
+        for key in due_keys:
+            due = self.refresh_cell(key)
+            with self._lock:
+                heapq.heappush(self._heap, (due, next(self._seq), key))
+        return len(due_keys)
+
+    def run_forever(self, stop: threading.Event = None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.run_due()
+            due = self.next_due()
+            stop.wait(max(1.0, due - time.time()) if due is not None else MIN_INTERVAL)
+
+    def stats(self) -> dict:
+        return {
+            "cells": len(self.cells),
+            "locations": sum(len(c["watchers"]) for c in self.cells.values()),
+            "refreshes": self.refreshes,
+            "unchanged": self.unchanged,
+            "failures": self.failures,
+            "diffs": self.diffs,
+        }
+
+    def close(self):
+        self.state.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch locations and print forecast changes as NDJSON.")
+    parser.add_argument("watchlist", help="file with one ZIP / 'city, state' per line ('-' for stdin)")
+    parser.add_argument("--once", action="store_true", help="refresh whatever is due, then exit")
+    parser.add_argument("--state", default=STATE_PATH, help="where the last-seen forecasts are kept")
+    args = parser.parse_args(argv)
+
+    if args.watchlist == "-":
+        queries = list(weathery.read_queries(sys.stdin))
+    else:
+        with open(args.watchlist, encoding="utf-8") as src:
+            queries = list(weathery.read_queries(src))
+    scheduler = RefreshScheduler(args.state)
+    try:
+        for query in queries:
+            if not scheduler.watch(query):
+                print(f"{query}: couldn't resolve to an NWS grid cell", file=sys.stderr)
+        if args.once:
+            scheduler.run_due()
+        else:
+            scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(scheduler.stats()), file=sys.stderr)
+        scheduler.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Resident forecast service: weathery's lookup chain behind a small asyncio HTTP server
+- Start it with:  python -m weathery serve --port 8080
+- GET /forecast?q=44512        -> JSON forecast (location + NWS periods)
+- GET /stats                   -> request counts, coalescing, p50/p99 latency
+- GET /healthz                 -> "ok"
+
+The process stays up, so imports, caches and pooled connections stay warm between
+requests. Blocking lookups run in a bounded thread pool; concurrent requests for the
+same location share one upstream lookup (request coalescing).
+
+Only uses the standard library (plus whatever the forecast function needs).
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from single_flight import SingleFlight
+
+MAX_WORKERS = 16        # blocking lookups running at once
+MAX_QUEUE = 256         # requests waiting for a worker before we answer 503
+LATENCY_WINDOW = 10000  # how many recent request latencies the percentiles cover
+MAX_REQUEST_LINE = 8192
+
+
+class ServiceBusy(Exception):
+    """Every worker and queue slot is taken."""
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+class ForecastService:
+    def __init__(self, forecast, normalize=str.strip, max_workers: int = MAX_WORKERS, max_queue: int = MAX_QUEUE):
+        """forecast(query) -> dict runs in a worker thread; normalize(query) -> coalescing key."""
+        self.forecast = forecast
+        self.normalize = normalize
+        self.pool = ThreadPoolExecutor(max_workers, thread_name_prefix="forecast")
+        self.slots = asyncio.Semaphore(max_workers + max_queue)
+        self.flight = SingleFlight("service")
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.started = time.time()
+        self.requests = 0
+        self.rejected = 0
+        self.errors = 0
+
+    async def lookup(self, query: str) -> dict:
+        """Forecast for query; joins an identical lookup that's already running."""
+        key = self.normalize(query)
+        if self.flight.pending(key):
+            return await self.flight.do_async(key, self.forecast, query, executor=self.pool)
+
+        # Only new upstream lookups take a slot; joining one above is free
+        if self.slots.locked():
+            raise ServiceBusy()
+        async with self.slots:
+            return await self.flight.do_async(key, self.forecast, query, executor=self.pool)
+
+    def stats(self) -> dict:
+        ordered = sorted(self.latencies)
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "upstream_lookups": self.flight.calls,
+            "coalesced": self.flight.shared,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "in_flight": len(self.flight),
+            "latency_ms": {
+                "p50": round(percentile(ordered, 50) * 1000, 2),
+                "p99": round(percentile(ordered, 99) * 1000, 2),
+                "max": round((ordered[-1] if ordered else 0) * 1000, 2),
+                "samples": len(ordered),
+            },
+        }
+
+    async def route(self, target: str):
+        """(status, payload) for one GET request target."""
+        parts = urlsplit(target)
+        if parts.path == "/healthz":
+            return 200, "ok"
+        if parts.path == "/stats":
+            return 200, self.stats()
+        if parts.path != "/forecast":
+            return 404, {"error": "not found"}
+
+        query = (parse_qs(parts.query).get("q") or [""])[0].strip()
+        if not query:
+            return 400, {"error": "missing ?q= (ZIP code or 'city, state')"}
+        start = time.perf_counter()
+        try:
+            result = await self.lookup(query)
+        except ServiceBusy:
+            self.rejected += 1
+            return 503, {"error": "busy, try again shortly"}
+        except Exception as e:
+            self.errors += 1
+            return 500, {"error": f"lookup failed: {e}"}
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+        if result.get("error"):
+            return 502, result
+        return 200, result
+
+    async def handle(self, reader, writer):
+        """One connection; serves requests until the client closes or asks us to."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line or len(request_line) > MAX_REQUEST_LINE:
+                    break
+                keep_alive = True
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if name.strip().lower() == "connection" and value.strip().lower() == "close":
+                        keep_alive = False
+
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "bad request"}, False)
+                    break
+                self.requests += 1
+                if method != "GET":
+                    status, payload = 405, {"error": "only GET is supported"}
+                else:
+                    status, payload = await self.route(target)
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status: int, payload, keep_alive: bool):
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                   500: "Internal Server Error", 502: "Bad Gateway", 503: "Service Unavailable"}
+        if isinstance(payload, str):
+            body, ctype = payload.encode(), "text/plain; charset=utf-8"
+        else:
+            body, ctype = json.dumps(payload, default=str).encode(), "application/json"
+        head = (f"HTTP/1.1 {status} {reasons.get(status, 'OK')}\r\n"
+                f"Content-Type: {ctype}\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port)
+        addr = server.sockets[0].getsockname()
+        print(f"Forecast service on http://{addr[0]}:{addr[1]}/forecast?q=44512", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+
+def serve_main(argv, forecast, normalize=str.strip) -> int:
+    """CLI entry point used by `python -m weathery serve`."""
+    parser = argparse.ArgumentParser(prog="weathery serve", description="Run the forecast HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE)
+    args = parser.parse_args(argv)
+
+    async def run():
+        service = ForecastService(forecast, normalize, args.workers, args.max_queue)
+        try:
+            await service.serve(args.host, args.port)
+        finally:
+            print(json.dumps(service.stats()), file=sys.stderr)
+            service.pool.shutdown(wait=False)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+NWS hourly forecasts and raw gridpoint data as NumPy arrays
+- load_grid_series: one forecastGridData layer (temperature, dewpoint,
+  quantitativePrecipitation, windSpeed, ...) -> hourly (times, values) arrays.
+  Each ISO 8601 'validTime' interval ("2026-10-18T06:00:00+00:00/PT3H") becomes
+  one value per hour via np.repeat; accumulations (QPF, snow) are spread evenly.
+- load_hourly: forecastHourly periods -> a dict of column arrays
+- stack: many locations' series on one shared hourly time axis (NaN where missing)
+- Vectorized helpers that work on whole arrays, one location or thousands:
+  unit conversion, relative humidity, heat index, daily min/max/mean
+
+Values are converted to one unit per quantity: degC, km/h, mm, percent, degrees.
+
+  python grid_data.py 44512 "Youngstown, OH"
+
+Dependencies: numpy (plus requests and geopy through weathery.py for fetching)
+  pip install numpy
+"""
+
+import re
+import sys
+import argparse
+from datetime import datetime
+from collections import namedtuple
+import numpy as np
+from forecast_model import parse_wind_speed
+
+HOUR = np.timedelta64(1, "h")
+DURATION_RE = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+GRID_LAYERS = ("temperature", "dewpoint", "relativeHumidity", "apparentTemperature",
+               "quantitativePrecipitation", "probabilityOfPrecipitation",
+               "windSpeed", "windGust", "windDirection")
+# Layers whose value is a total over the interval rather than a level
+ACCUMULATED = {"quantitativePrecipitation", "snowfallAmount", "iceAccumulation"}
+
+GridSeries = namedtuple("GridSeries", "times values unit")
+
+
+def c_to_f(c):
+    return np.asarray(c, dtype=float) * 9 / 5 + 32
+
+
+def f_to_c(f):
+    return (np.asarray(f, dtype=float) - 32) * 5 / 9
+
+
+def kmh_to_mph(kmh):
+    return np.asarray(kmh, dtype=float) / 1.609344
+
+
+def mph_to_kmh(mph):
+    return np.asarray(mph, dtype=float) * 1.609344
+
+
+def mm_to_in(mm):
+    return np.asarray(mm, dtype=float) / 25.4
+
+
+# NWS unit code -> (canonical unit, converter or None)
+UNITS = {
+    "wmoUnit:degC": ("degC", None),
+    "wmoUnit:degF": ("degC", f_to_c),
+    "wmoUnit:km_h-1": ("km_h-1", None),
+    "wmoUnit:m_s-1": ("km_h-1", lambda v: np.asarray(v, dtype=float) * 3.6),
+    "wmoUnit:mm": ("mm", None),
+    "wmoUnit:percent": ("percent", None),
+    "wmoUnit:degree_(angle)": ("degree_(angle)", None),
+}
+
+
+def parse_interval(valid_time: str):
+    """'2026-10-18T06:00:00+00:00/PT3H' -> (POSIX seconds, hours); at least one hour."""
+    start, _, duration = valid_time.partition("/")
+    seconds = int(datetime.fromisoformat(start).timestamp())
+    match = DURATION_RE.match(duration)
+    if not match:
+        return seconds, 1
+    days, hours, minutes, _ = (int(g or 0) for g in match.groups())
+    return seconds, max(1, days * 24 + hours + round(minutes / 60))
+
+
+def decode_intervals(values):
+    """[{validTime, value}, ...] -> (starts datetime64[s], hours int64, values float64)."""
+    starts = np.empty(len(values), dtype=np.int64)
+    hours = np.empty(len(values), dtype=np.int64)
+    vals = np.empty(len(values), dtype=float)
+    for i, item in enumerate(values):
+        starts[i], hours[i] = parse_interval(item["validTime"])
+        value = item.get("value")
+        vals[i] = np.nan if value is None else value
+    return starts.astype("datetime64[s]"), hours, vals
+
+
+def expand_hourly(starts, hours, values, accumulated: bool = False):
+    """One entry per hour: repeat each interval's value across the hours it covers."""
+    idx = np.repeat(np.arange(len(hours)), hours)
+    offsets = np.arange(len(idx)) - np.repeat(np.cumsum(hours) - hours, hours)
+    times = starts.astype("datetime64[h]")[idx] + offsets.astype("timedelta64[h]")
+    out = values[idx]
+    if accumulated:
+        out = out / hours[idx]
+    return times, out
+
+
+def load_grid_series(props: dict, layer: str):
+    """GridSeries (hourly times, values, unit) for one gridpoint layer, or None if it's absent."""
+    data = props.get(layer)
+    if not data or not data.get("values"):
+        return None
+    starts, hours, vals = decode_intervals(data["values"])
+    times, values = expand_hourly(starts, hours, vals, accumulated=layer in ACCUMULATED)
+    unit, convert = UNITS.get(data.get("uom"), (data.get("uom"), None))
+    if convert:
+        values = convert(values)
+    return GridSeries(times, values, unit)
+
+
+def load_grid(props: dict, layers=GRID_LAYERS) -> dict:
+    """{layer: GridSeries} for every requested layer present in a forecastGridData document."""
+    series = {}
+    for layer in layers:
+        s = load_grid_series(props, layer)
+        if s is not None:
+            series[layer] = s
+    return series
+
+
+def _quantity(value):
+    if isinstance(value, dict):
+        value = value.get("value")
+    return np.nan if value is None else float(value)
+
+
+def load_hourly(props: dict) -> dict:
+    """Column arrays for a forecastHourly document (temperatures in degC, wind in km/h).
+
+    Keys: time (datetime64[h], UTC), temperature, dewpoint, relative_humidity,
+    precip_probability, wind_speed, wind_direction, utc_offset (hours, from the
+    first period's local time).
+    """
+    periods = props.get("periods") or []
+    n = len(periods)
+    time = np.empty(n, dtype=np.int64)
+    temp, dew, rh, pop, wind = (np.empty(n) for _ in range(5))
+    fahrenheit = np.zeros(n, dtype=bool)
+    direction = []
+    utc_offset = 0.0
+    for i, p in enumerate(periods):
+        start = datetime.fromisoformat(p["startTime"])
+        if i == 0 and start.utcoffset() is not None:
+            utc_offset = start.utcoffset().total_seconds() / 3600
+        time[i] = int(start.timestamp())
+        temp[i] = _quantity(p.get("temperature"))
+        fahrenheit[i] = (p.get("temperatureUnit") or "F") == "F"
+        dew[i] = _quantity(p.get("dewpoint"))
+        rh[i] = _quantity(p.get("relativeHumidity"))
+        pop[i] = _quantity(p.get("probabilityOfPrecipitation"))
+        speed = parse_wind_speed(p.get("windSpeed"))
+        wind[i] = np.nan if speed is None else speed
+        direction.append(p.get("windDirection") or "")
+    return {
+        "time": time.astype("datetime64[s]").astype("datetime64[h]"),
+        "temperature": np.where(fahrenheit, f_to_c(temp), temp),
+        "dewpoint": dew,
+        "relative_humidity": rh,
+        "precip_probability": pop,
+        "wind_speed": mph_to_kmh(wind),
+        "wind_direction": np.array(direction),
+        "utc_offset": utc_offset,
+    }
+
+
+def stack(series_list, start=None, end=None):
+    """Put many (times, values) series on one hourly axis.
+
+    Returns (times, values2d) with one row per series, in order, and NaN wherever a
+    series has no data (a None series is an all-NaN row).
+    """
+    present = [s for s in series_list if s is not None and len(s[0])]
+    if start is None:
+        start = min(s[0][0] for s in present) if present else None
+    if end is None:
+        end = max(s[0][-1] for s in present) + HOUR if present else None
+    if start is None or end is None:
+        return np.array([], dtype="datetime64[h]"), np.full((len(series_list), 0), np.nan)
+    start, end = np.datetime64(start, "h"), np.datetime64(end, "h")
+    times = np.arange(start, end, HOUR)
+    out = np.full((len(series_list), len(times)), np.nan)
+    for row, s in zip(out, series_list):
+        if s is None:
+            continue
+        pos = (s[0] - start) // HOUR
+        keep = (pos >= 0) & (pos < len(times))
+        row[pos[keep]] = s[1][keep]
+    return times, out
+
+
+def relative_humidity(temp_c, dewpoint_c):
+    """Percent relative humidity from temperature and dewpoint (Magnus formula)."""
+    t = np.asarray(temp_c, dtype=float)
+    td = np.asarray(dewpoint_c, dtype=float)
+    return 100 * np.exp(17.625 * td / (243.04 + td) - 17.625 * t / (243.04 + t))
+
+
+def heat_index(temp_f, rh):
+    """NWS heat index (°F): Steadman's simple formula, Rothfusz regression above 80 °F."""
+    t = np.asarray(temp_f, dtype=float)
+    rh = np.asarray(rh, dtype=float)
+    simple = 0.5 * (t + 61.0 + (t - 68.0) * 1.2 + rh * 0.094)
+    full = (-42.379 + 2.04901523 * t + 10.14333127 * rh - 0.22475541 * t * rh
+            - 0.00683783 * t * t - 0.05481717 * rh * rh + 0.00122874 * t * t * rh
+            + 0.00085282 * t * rh * rh - 0.00000199 * t * t * rh * rh)
+    with np.errstate(invalid="ignore"):
+        dry = (rh < 13) & (t >= 80) & (t <= 112)
+        full = np.where(dry, full - (13 - rh) / 4 * np.sqrt(np.clip(17 - np.abs(t - 95), 0, None) / 17), full)
+        humid = (rh > 85) & (t >= 80) & (t <= 87)
+        full = np.where(humid, full + (rh - 85) / 10 * (87 - t) / 5, full)
+        return np.where((simple + t) / 2 >= 80, full, simple)
+
+
+def daily_stats(times, values, utc_offset: float = 0.0):
+    """Per-day (days, min, max, mean) over hourly values, ignoring NaN.
+
+    values is 1-D, or 2-D with one row per location sharing `times` (as from stack()).
+    Days are calendar days at utc_offset hours from UTC.
+    """
+    times = np.asarray(times, dtype="datetime64[h]")
+    v = np.atleast_2d(np.asarray(values, dtype=float))
+    if not len(times):
+        empty = np.empty((len(v), 0))
+        return np.array([], dtype="datetime64[D]"), empty, empty, empty
+    local_day = (times + np.timedelta64(round(utc_offset * 60), "m")).astype("datetime64[D]")
+    starts = np.concatenate(([0], np.flatnonzero(local_day[1:] != local_day[:-1]) + 1))
+    valid = ~np.isnan(v)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        lo = np.fmin.reduceat(v, starts, axis=1)
+        hi = np.fmax.reduceat(v, starts, axis=1)
+        mean = np.add.reduceat(np.where(valid, v, 0.0), starts, axis=1) / np.add.reduceat(valid, starts, axis=1)
+    if np.ndim(values) == 1:
+        lo, hi, mean = lo[0], hi[0], mean[0]
+    return local_day[starts], lo, hi, mean
+
+
+def fetch_location(query: str):
+    """(label, gridpoint props, hourly props) for a ZIP / 'city, state' via weathery, or None."""
+    import weathery
+    geocoded = weathery.geocode(query)
+    points = weathery.get_points_metadata(*geocoded[:2]) if geocoded else None
+    props = (points or {}).get("properties", {})
+    if not props.get("forecastGridData"):
+        return None
+    grid = weathery.get_grid_document(props["forecastGridData"], "grid")
+    hourly = weathery.get_grid_document(props["forecastHourly"], "hourly") if props.get("forecastHourly") else None
+    if grid is None:
+        return None
+    return weathery.pretty_location(points, geocoded[2]), grid, hourly or {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Daily temperature and heat index from NWS gridpoint data.")
+    parser.add_argument("queries", nargs="+", metavar="QUERY", help="ZIP code or 'city, state'")
+    args = parser.parse_args(argv)
+
+    labels, temps, humidity, offsets = [], [], [], []
+    for query in args.queries:
+        found = fetch_location(query)
+        if found is None:
+            print(f"{query}: no gridpoint data", file=sys.stderr)
+            continue
+        label, grid, hourly = found
+        labels.append(label)
+        temps.append(load_grid_series(grid, "temperature"))
+        humidity.append(load_grid_series(grid, "relativeHumidity"))
+        offsets.append(load_hourly(hourly)["utc_offset"] if hourly.get("periods") else 0.0)
+    if not labels:
+        return 1
+
+    # Every location on one axis, so the math below runs once for all of them
+    times, temp_c = stack(temps)
+    if not len(times):
+        return 1
+    _, rh = stack(humidity, start=times[0], end=times[-1] + HOUR)
+    temp_f = c_to_f(temp_c)
+    hi_f = heat_index(temp_f, rh)
+    for i, label in enumerate(labels):
+        days, lo, hi, mean = daily_stats(times, temp_f[i], offsets[i])
+        _, _, hi_index, _ = daily_stats(times, hi_f[i], offsets[i])
+        print(f"\n{label}")
+        print(f"  {'day':<12}{'min °F':>8}{'max °F':>8}{'mean °F':>9}{'heat idx':>10}")
+        for d, a, b, c, h in zip(days, lo, hi, mean, hi_index):
+            if not np.isnan(c):
+                print(f"  {str(d):<12}{a:>8.0f}{b:>8.0f}{c:>9.1f}{h:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
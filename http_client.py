@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for the weather scripts
+- One pooled requests.Session, so repeat calls reuse TCP+TLS connections (keep-alive)
+- Configurable pool sizes and default timeout
+- Asks for compressed responses (gzip/deflate, plus br when a brotli package is installed)
+- Remembers ETag / Last-Modified per URL and sends If-None-Match / If-Modified-Since,
+  so an unchanged resource comes back as a cheap 304 and we replay the stored body;
+  stored bodies are bounded by count and total bytes, and very large ones aren't kept
+- Optional per-host token-bucket rate limits, and retries with jittered exponential
+  backoff that honor Retry-After (see rate_limit.py)
+
+Dependencies: requests
+  pip install requests
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from rate_limit import TokenBucket, RetryPolicy
+
+DEFAULT_TIMEOUT = 12  # seconds
+POOL_CONNECTIONS = 10   # number of hosts to keep pools for
+POOL_MAXSIZE = 32       # connections kept alive per host
+MAX_VALIDATORS = 512    # URLs we remember ETag/Last-Modified + body for
+MAX_VALIDATOR_BYTES = 32 * 1024 * 1024   # total size of those stored bodies
+MAX_VALIDATOR_BODY = 1024 * 1024         # bigger bodies aren't stored (no conditional GET for them)
+
+
+def _accept_encoding() -> str:
+    # urllib3 only decodes brotli when one of these is importable
+    for mod in ("brotli", "brotlicffi"):
+        try:
+            __import__(mod)
+            return "gzip, deflate, br"
+        except ImportError:
+            pass
+    return "gzip, deflate"
+
+
+class HttpClient:
+    def __init__(self, pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE,
+                 timeout: float = DEFAULT_TIMEOUT, headers: dict = None, max_validators: int = MAX_VALIDATORS,
+                 retry: RetryPolicy = None, max_validator_bytes: int = MAX_VALIDATOR_BYTES,
+                 max_validator_body: int = MAX_VALIDATOR_BODY):
+        self.timeout = timeout
+        self.max_validators = max_validators
+        self.max_validator_bytes = max_validator_bytes
+        self.max_validator_body = max_validator_body
+        self.retry = retry or RetryPolicy()
+        self.limiters = {}  # host -> TokenBucket
+        self.not_modified = 0  # how many 304s we turned into cached responses
+        self.retries = 0
+        self.backoff_seconds = 0.0
+        self.gave_up = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept-Encoding": _accept_encoding(), "Connection": "keep-alive"})
+        if headers:
+            self.session.headers.update(headers)
+
+        # url -> (etag, last_modified, status, headers, content, final_url)
+        self._validators = OrderedDict()
+        self._validator_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str, headers: dict = None, timeout: float = None, conditional: bool = True, **kwargs):
+        """GET url through the pooled session.
+
+        With conditional=True, a stored validator is sent along and a 304 reply is
+        turned back into a normal 200 response carrying the stored body.
+        """
+        headers = dict(headers or {})
+        stored = None
+        if conditional:
+            with self._lock:
+                stored = self._validators.get(url)
+                if stored:
+                    self._validators.move_to_end(url)
+            if stored:
+                etag, last_modified = stored[0], stored[1]
+                if etag:
+                    headers.setdefault("If-None-Match", etag)
+                if last_modified:
+                    headers.setdefault("If-Modified-Since", last_modified)
+
+        r = self._send(url, headers, timeout or self.timeout, **kwargs)
+
+        if r.status_code == 304 and stored:
+            with self._lock:
+                self.not_modified += 1
+            return self._replay(r, stored)
+        if conditional and r.status_code == 200:
+            self._remember(url, r)
+        return r
+
+    def set_rate_limit(self, host: str, rate: float, burst: int = 1):
+        """Limit requests to `host` to `rate` per second, shared across all threads."""
+        self.limiters[host] = TokenBucket(rate, burst)
+
+    def _send(self, url: str, headers: dict, timeout: float, **kwargs):
+        """One logical GET: waits for the host's rate limit and retries throttled/failed tries."""
+        limiter = self.limiters.get(urlsplit(url).hostname)
+        attempt = 0
+        while True:
+            if limiter:
+                limiter.acquire()
+            try:
+                r = self.session.get(url, headers=headers, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retry.max_retries:
+                    self._count(gave_up=1)
+                    raise
+                delay = self.retry.delay(attempt)
+            else:
+                if r.status_code not in self.retry.retry_statuses:
+                    return r
+                delay = None
+                if attempt < self.retry.max_retries:
+                    delay = self.retry.delay(attempt, r.headers.get("Retry-After"))
+                if delay is None:
+                    # Out of retries, or told to come back later than we're willing to wait
+                    self._count(gave_up=1)
+                    return r
+                r.close()
+                if limiter and r.status_code == 429:
+                    # The server is throttling this host: hold back every worker, not just us
+                    limiter.pause(delay)
+                    delay = 0
+            self._count(retries=1, backoff_seconds=delay)
+            if delay:
+                time.sleep(delay)
+            attempt += 1
+
+    def _count(self, retries: int = 0, backoff_seconds: float = 0.0, gave_up: int = 0):
+        # Called from every worker thread, so the read-modify-writes need the lock
+        with self._lock:
+            self.retries += retries
+            self.backoff_seconds += backoff_seconds
+            self.gave_up += gave_up
+
+    def metrics(self) -> dict:
+        """Counters for tuning throughput against upstream limits."""
+        throttled = sum(b.throttled_seconds for b in self.limiters.values())
+        return {
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "backoff_seconds": round(self.backoff_seconds, 3),
+            "throttled_seconds": round(throttled, 3),
+            "not_modified": self.not_modified,
+        }
+
+    def _remember(self, url: str, r):
+        etag = r.headers.get("ETag")
+        last_modified = r.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        content = r.content
+        with self._lock:
+            old = self._validators.pop(url, None)
+            if old:
+                self._validator_bytes -= len(old[4])
+            if len(content) > self.max_validator_body:
+                return
+            self._validators[url] = (etag, last_modified, r.status_code, dict(r.headers), content, r.url)
+            self._validator_bytes += len(content)
+            while (len(self._validators) > self.max_validators
+                   or self._validator_bytes > self.max_validator_bytes):
+                _, evicted = self._validators.popitem(last=False)
+                self._validator_bytes -= len(evicted[4])
+
+    def _replay(self, not_modified, stored):
+        """Build a 200 response from the stored copy, refreshed with the 304's headers."""
+        _, _, status, headers, content, final_url = stored
+        r = requests.Response()
+        r.status_code = status
+        r.headers = CaseInsensitiveDict(headers)
+        # A 304 may carry updated Cache-Control/Expires/Date; those win
+        r.headers.update(not_modified.headers)
+        r._content = content
+        r.url = final_url
+        r.encoding = get_encoding_from_headers(r.headers)
+        r.request = not_modified.request
+        r.reason = "OK (not modified)"
+        r.elapsed = not_modified.elapsed
+        r.from_cache = True
+        return r
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Return the process-wide shared client, creating it on first use."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
+
+
+def configure(**kwargs) -> HttpClient:
+    """Replace the shared client with one built from kwargs (pool sizes, timeout, headers...)."""
+    global _default_client
+    with _default_lock:
+        if _default_client is not None:
+            _default_client.close()
+        _default_client = HttpClient(**kwargs)
+        return _default_client
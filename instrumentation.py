@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Lightweight stage timing and profiling for the weather scripts
+- span("points") is a context manager that times one stage into a histogram
+- observe_size("points", len(body)) records payload sizes the same way
+- Histograms use fixed Prometheus-style buckets plus count/sum/min/max, so
+  recording is a perf_counter call and a short locked update
+- Export everything as JSON (to_json) or Prometheus text format (to_prometheus)
+- profiled("cprofile") / profiled("pyinstrument") wraps a whole run in a profiler
+
+  with span("forecast"):
+      r = client.get(url)
+  observe_size("forecast", len(r.content))
+
+Only uses the standard library (pyinstrument is optional).
+"""
+
+import sys
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+PREFIX = "weathery"
+
+enabled = True
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (max for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "count": self.count,
+                "sum": self.sum,
+                "min": self.min,
+                "max": self.max,
+                "p50": self.quantile(0.5),
+                "p99": self.quantile(0.99),
+                "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+            }
+
+
+durations = {}   # stage -> Histogram of seconds
+sizes = {}       # name -> Histogram of bytes
+_registry_lock = threading.Lock()
+
+
+def _histogram(table: dict, name: str, buckets) -> Histogram:
+    hist = table.get(name)
+    if hist is None:
+        with _registry_lock:
+            hist = table.setdefault(name, Histogram(buckets))
+    return hist
+
+
+@contextmanager
+def span(stage: str):
+    """Time the block into the `stage` histogram (exceptions are timed too)."""
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _histogram(durations, stage, DURATION_BUCKETS).observe(time.perf_counter() - start)
+
+
+def timed(stage: str):
+    """Decorator version of span()."""
+    def wrap(fn):
+        def inner(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        inner.__name__, inner.__doc__, inner.__wrapped__ = fn.__name__, fn.__doc__, fn
+        return inner
+    return wrap
+
+
+def observe_size(name: str, size: int):
+    if enabled:
+        _histogram(sizes, name, SIZE_BUCKETS).observe(size)
+
+
+def reset():
+    with _registry_lock:
+        durations.clear()
+        sizes.clear()
+
+
+def to_json() -> dict:
+    return {
+        "stage_seconds": {name: h.snapshot() for name, h in sorted(durations.items())},
+        "payload_bytes": {name: h.snapshot() for name, h in sorted(sizes.items())},
+    }
+
+
+def to_prometheus() -> str:
+    """Prometheus text exposition format (histograms with a stage / name label)."""
+    lines = []
+    for metric, label, table in ((f"{PREFIX}_stage_seconds", "stage", durations),
+                                 (f"{PREFIX}_payload_bytes", "name", sizes)):
+        if not table:
+            continue
+        lines.append(f"# TYPE {metric} histogram")
+        for name, h in sorted(table.items()):
+            snap = h.snapshot()
+            cumulative = 0
+            for le, n in snap["buckets"].items():
+                cumulative += n
+                lines.append(f'{metric}_bucket{{{label}="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{label}="{name}"}} {snap["sum"]:.6f}')
+            lines.append(f'{metric}_count{{{label}="{name}"}} {snap["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: str):
+    """Write metrics to path: Prometheus text for *.prom / *.txt, else JSON ('-' = stderr)."""
+    text = to_prometheus() if path.endswith((".prom", ".txt")) else json.dumps(to_json(), indent=2) + "\n"
+    if path == "-":
+        sys.stderr.write(text)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def print_summary(file=None):
+    """One line per stage: count, p50/p99 and total time."""
+    file = file or sys.stderr
+    for name, h in sorted(durations.items(), key=lambda kv: -kv[1].sum):
+        snap = h.snapshot()
+        print(f"{name:<22}{snap['count']:>7} calls  p50 {snap['p50'] * 1000:>8.1f} ms  "
+              f"p99 {snap['p99'] * 1000:>8.1f} ms  total {snap['sum']:.3f} s", file=file)
+
+
+@contextmanager
+def profiled(mode: str = None, out: str = None):
+    """Run the block under a profiler: mode 'cprofile' or 'pyinstrument' (None = no-op).
+
+    cProfile output goes to `out` as a pstats file if given, else the top entries to stderr;
+    pyinstrument writes an HTML report to `out` if given, else text to stderr.
+    """
+    if not mode:
+        yield
+        return
+    if mode == "cprofile":
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if out:
+                profiler.dump_stats(out)
+            else:
+                pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(30)
+    elif mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ValueError("--profile pyinstrument needs pyinstrument (pip install pyinstrument)") from None
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            if out:
+                with open(out, "w", encoding="utf-8") as f:
+                    f.write(profiler.output_html())
+            else:
+                sys.stderr.write(profiler.output_text())
+    else:
+        raise ValueError(f"unknown profiler {mode!r} (use 'cprofile' or 'pyinstrument')")
+
+
+def add_arguments(parser):
+    """Add the shared --profile / --profile-out / --metrics flags to an argparse parser."""
+    parser.add_argument("--profile", choices=("cprofile", "pyinstrument"),
+                        help="run under a profiler and report where the time went")
+    parser.add_argument("--profile-out", metavar="FILE",
+                        help="save the profile (pstats file for cprofile, HTML for pyinstrument)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="write stage timings on exit: JSON, or Prometheus text for *.prom ('-' = stderr)")
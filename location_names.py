@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Canonical location strings, so trivially different inputs share one cache key
+- "Youngstown, OH", "youngstown oh" and "Youngstown, Ohio" all become "Youngstown, OH"
+- State names and abbreviations sit in a token trie. Input that is a whole state
+  ("west virginia") is that state; otherwise the longest state at the end of the
+  input that leaves a city in front of it is peeled off ("new york", "mt")
+- City names sit in a second token trie: a bundled list of the largest US cities
+  (CITIES), plus every city in the offline ZIP index once it has been built (see
+  zip_index.py); known cities get their proper spelling. Only with the ZIP index
+  loaded does a city that exists in one state get that state filled in, since the
+  bundled list alone can't tell ("Springfield" is in a dozen states)
+- In city names "St" / "Ft" / "Mt" / "Pt" match "Saint" / "Fort" / "Mount" / "Point"
+  (state abbreviations are matched before that, so "MT" stays Montana); matching is
+  case-insensitive and ignores punctuation, but accented letters are kept
+- An unknown city keeps the user's spelling ("Coeur d'Alene", "Winston-Salem",
+  "São Paulo"); all-lowercase input is capitalized
+- ZIP codes (and ZIP+4) come back as the 5-digit ZIP
+
+  canonical("youngstown ohio")      -> "Youngstown, OH"
+  canonical_key("youngstown, Ohio") -> "youngstown, oh"
+  geocoder_query("Montréal, QC")   -> "Montréal, QC"   (nothing recognized: left alone)
+
+Everything is in memory; a lookup is a few dict probes.
+
+Only uses the standard library.
+"""
+
+import os
+import re
+import sys
+from functools import lru_cache
+from collections import namedtuple
+
+ZIP_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "zip_index.bin")
+
+STATES = {
+    "Alabama": "AL", "Alaska": "AK", "Arizona": "AZ", "Arkansas": "AR", "California": "CA",
+    "Colorado": "CO", "Connecticut": "CT", "Delaware": "DE", "Florida": "FL", "Georgia": "GA",
+    "Hawaii": "HI", "Idaho": "ID", "Illinois": "IL", "Indiana": "IN", "Iowa": "IA",
+    "Kansas": "KS", "Kentucky": "KY", "Louisiana": "LA", "Maine": "ME", "Maryland": "MD",
+    "Massachusetts": "MA", "Michigan": "MI", "Minnesota": "MN", "Mississippi": "MS", "Missouri": "MO",
+    "Montana": "MT", "Nebraska": "NE", "Nevada": "NV", "New Hampshire": "NH", "New Jersey": "NJ",
+    "New Mexico": "NM", "New York": "NY", "North Carolina": "NC", "North Dakota": "ND", "Ohio": "OH",
+    "Oklahoma": "OK", "Oregon": "OR", "Pennsylvania": "PA", "Rhode Island": "RI", "South Carolina": "SC",
+    "South Dakota": "SD", "Tennessee": "TN", "Texas": "TX", "Utah": "UT", "Vermont": "VT",
+    "Virginia": "VA", "Washington": "WA", "West Virginia": "WV", "Wisconsin": "WI", "Wyoming": "WY",
+    "District of Columbia": "DC", "Washington DC": "DC", "Puerto Rico": "PR", "Guam": "GU",
+    "US Virgin Islands": "VI", "Virgin Islands": "VI", "American Samoa": "AS",
+    "Northern Mariana Islands": "MP",
+}
+# Abbreviation -> the first (official) name listed for it
+STATE_NAMES = {abbr: name for name, abbr in reversed(STATES.items())}
+# Bundled so common cities are recognized without the ZIP index: state -> cities
+CITIES = {
+    "AK": "Anchorage", "AL": "Birmingham|Huntsville|Mobile|Montgomery", "AR": "Little Rock",
+    "AZ": "Chandler|Glendale|Mesa|Phoenix|Scottsdale|Tucson", "CA": "Anaheim|Bakersfield|Chula Vista|"
+    "Fresno|Irvine|Long Beach|Los Angeles|Oakland|Riverside|Sacramento|San Diego|San Francisco|"
+    "San Jose|Santa Ana|Stockton", "CO": "Aurora|Colorado Springs|Denver", "CT": "Bridgeport|Hartford",
+    "DC": "Washington", "DE": "Wilmington", "FL": "Hialeah|Jacksonville|Miami|Orlando|Saint Petersburg|"
+    "Tallahassee|Tampa", "GA": "Atlanta|Savannah", "HI": "Honolulu", "IA": "Des Moines", "ID": "Boise",
+    "IL": "Chicago|Springfield", "IN": "Fort Wayne|Indianapolis", "KS": "Wichita", "KY": "Lexington|Louisville",
+    "LA": "Baton Rouge|New Orleans", "MA": "Boston|Worcester", "MD": "Baltimore", "ME": "Portland",
+    "MI": "Detroit|Grand Rapids", "MN": "Minneapolis|Saint Paul", "MO": "Kansas City|Saint Louis",
+    "MS": "Jackson", "MT": "Billings", "NC": "Charlotte|Durham|Greensboro|Raleigh|Winston-Salem",
+    "ND": "Fargo", "NE": "Lincoln|Omaha", "NH": "Manchester", "NJ": "Jersey City|Newark",
+    "NM": "Albuquerque", "NV": "Henderson|Las Vegas|Reno", "NY": "Buffalo|New York|Rochester",
+    "OH": "Cincinnati|Cleveland|Columbus|Toledo", "OK": "Oklahoma City|Tulsa", "OR": "Portland",
+    "PA": "Philadelphia|Pittsburgh", "RI": "Providence", "SC": "Charleston|Columbia",
+    "SD": "Sioux Falls", "TN": "Memphis|Nashville", "TX": "Arlington|Austin|Corpus Christi|Dallas|"
+    "El Paso|Fort Worth|Houston|Laredo|Lubbock|Plano|San Antonio", "UT": "Salt Lake City",
+    "VA": "Chesapeake|Norfolk|Richmond|Virginia Beach", "VT": "Burlington", "WA": "Seattle|Spokane|Tacoma",
+    "WI": "Madison|Milwaukee", "WV": "Charleston", "WY": "Cheyenne",
+}
+# Spelled-out forms, so "St Louis" and "Saint Louis" are the same city
+EXPANSIONS = {"st": "saint", "ste": "sainte", "ft": "fort", "mt": "mount", "pt": "point"}
+ZIP_RE = re.compile(r"^(\d{5})(?:-\d{4})?$")
+# Letters and digits in any script; an apostrophe inside a word ("d'Alene") is part of it
+WORD_RE = re.compile(r"[^\W_]+(?:['’][^\W_]+)*")
+APOSTROPHES_RE = re.compile(r"['’]")
+CAPITALIZE_RE = re.compile(r"(^|[\s-])([^\W\d_])")
+
+Location = namedtuple("Location", "zip city state")
+
+
+def words(text: str) -> list:
+    """'St. Louis,  MO' -> ['st', 'louis', 'mo']; "Coeur d'Alene" -> ['coeur', 'dalene']."""
+    return [APOSTROPHES_RE.sub("", word).casefold() for word in WORD_RE.findall(text)]
+
+
+def as_typed(text: str) -> str:
+    """The user's own spelling, whitespace tidied; all-lowercase input gets capitalized."""
+    text = " ".join(text.split())
+    if text == text.lower():
+        text = CAPITALIZE_RE.sub(lambda m: m.group(1) + m.group(2).upper(), text)
+    return text
+
+
+def tokens(text_or_words) -> list:
+    """Words with abbreviations spelled out: 'St. Louis,  MO' -> ['saint', 'louis', 'mo']."""
+    if isinstance(text_or_words, str):
+        text_or_words = words(text_or_words)
+    return [EXPANSIONS.get(word, word) for word in text_or_words]
+
+
+class TokenTrie:
+    """Maps token sequences to values; finds the longest stored sequence at the front of a list."""
+
+    END = ""   # tokens are never empty, so this key can't clash with one
+
+    def __init__(self):
+        self.root = {}
+        self.size = 0
+
+    def insert(self, words, value):
+        node = self.root
+        for word in words:
+            node = node.setdefault(word, {})
+        if self.END not in node:
+            self.size += 1
+        node[self.END] = value
+
+    def get(self, words, default=None):
+        node = self.root
+        for word in words:
+            node = node.get(word)
+            if node is None:
+                return default
+        return node.get(self.END, default)
+
+    def longest(self, words, limit: int = None):
+        """(length, value) of the longest stored prefix of words (at most limit long), or (0, None)."""
+        node = self.root
+        found = (0, None)
+        for i, word in enumerate(words[:limit]):
+            node = node.get(word)
+            if node is None:
+                break
+            if self.END in node:
+                found = (i + 1, node[self.END])
+        return found
+
+
+class LocationIndex:
+    def __init__(self):
+        self.states = TokenTrie()   # reversed state words (not expanded) -> abbreviation
+        self.cities = TokenTrie()   # city tokens -> {state: proper city name}
+        self.complete = False       # every US city is in self.cities (the ZIP index was loaded)
+        for name, abbr in STATES.items():
+            self.states.insert(words(name)[::-1], abbr)
+        for abbr in set(STATES.values()):
+            self.states.insert([abbr.lower()], abbr)
+        for state, names in CITIES.items():
+            for name in names.split("|"):
+                self.add_city(name, state)
+
+    def add_city(self, name: str, state: str):
+        words = tokens(name)
+        if not words:
+            return
+        spellings = self.cities.get(words)
+        if spellings is None:
+            spellings = {}
+            self.cities.insert(words, spellings)
+        spellings.setdefault(state, name)
+
+    @classmethod
+    def from_zip_index(cls, path: str = None):
+        """States, plus every city in the offline ZIP index if it exists (default ZIP_INDEX_PATH)."""
+        index = cls()
+        path = ZIP_INDEX_PATH if path is None else path
+        if path and os.path.exists(path):
+            from zip_index import ZipIndex
+            zips = ZipIndex(path)
+            try:
+                for city, state in zips.cities():
+                    index.add_city(city, state)
+            finally:
+                zips.close()
+            index.complete = True
+        return index
+
+    def parse(self, query: str) -> Location:
+        """Split free-form input into (zip, city, state); parts that aren't there are None."""
+        query = query.strip()
+        match = ZIP_RE.match(query)
+        if match:
+            return Location(match.group(1), None, None)
+        spans = [match.span() for match in WORD_RE.finditer(query)]
+        typed = words(query)
+        if not typed:
+            return Location(None, None, None)
+        # States are matched on the words as typed; only city words get St/Mt/... expanded
+        length, state = self.states.longest(typed[::-1], limit=len(typed) - 1)
+        whole = self.states.get(typed[::-1])
+        if whole:
+            # The whole input is a state ("west virginia"), unless it splits into a city
+            # we know in the trailing state ("washington dc"), or names a city of its
+            # own in that state ("new york")
+            peeled = self.cities.get(tokens(typed[:-length])) if state else None
+            if peeled and state in peeled:
+                return Location(None, peeled[state], state)
+            spellings = self.cities.get(tokens(typed))
+            if spellings and whole in spellings:
+                return Location(None, spellings[whole], whole)
+            return Location(None, None, whole)
+        if state:
+            spans, typed = spans[:-length], typed[:-length]
+
+        spellings = self.cities.get(tokens(typed))
+        if spellings:
+            if state in spellings:
+                return Location(None, spellings[state], state)
+            if state is None and self.complete and len(spellings) == 1:
+                # Only one state has a city by that name
+                (state, city), = spellings.items()
+                return Location(None, city, state)
+        # Not a city we know: keep it as typed, minus trailing punctuation before the state
+        return Location(None, as_typed(query[spans[0][0]:spans[-1][1]]), state)
+
+    def canonical(self, query: str) -> str:
+        """'youngstown ohio' -> 'Youngstown, OH'; a ZIP -> the 5-digit ZIP."""
+        location = self.parse(query)
+        if location.zip:
+            return location.zip
+        if location.city and location.state:
+            return f"{location.city}, {location.state}"
+        if location.state:
+            return STATE_NAMES[location.state]
+        return location.city or query.strip()
+
+    def key(self, query: str) -> str:
+        """Cache key: the canonical form reduced to its tokens, so case, punctuation,
+        'St' vs 'Saint' and 'Ohio' vs 'OH' don't matter."""
+        location = self.parse(query)
+        if location.zip:
+            return location.zip
+        city = " ".join(tokens(location.city)) if location.city else ""
+        if city and location.state:
+            return f"{city}, {location.state.lower()}"
+        if location.state:
+            return " ".join(words(STATE_NAMES[location.state]))
+        return city or query.strip().casefold()
+
+    def recognized(self, location: Location) -> bool:
+        """True when parse() found a ZIP, a state or a city it knows."""
+        return bool(location.zip or location.state
+                    or (location.city and self.cities.get(tokens(location.city))))
+
+    def geocoder_query(self, query: str) -> str:
+        """canonical(query) when something in it was recognized, else the input as given.
+
+        Rewriting text we didn't understand would only lose what a geocoder needs.
+        """
+        if self.recognized(self.parse(query)):
+            return self.canonical(query)
+        return query.strip()
+
+
+_index = None
+
+
+def get_index() -> LocationIndex:
+    """The shared index, built on first use."""
+    global _index
+    if _index is None:
+        _index = LocationIndex.from_zip_index()
+    return _index
+
+
+def reset_index():
+    """Forget the shared index (e.g. after building or changing ZIP_INDEX_PATH)."""
+    global _index
+    _index = None
+    canonical.cache_clear()
+    canonical_key.cache_clear()
+
+
+def zip_code(query: str):
+    """The 5-digit ZIP if query is a ZIP (or ZIP+4), else None; never builds the index."""
+    match = ZIP_RE.match(query.strip())
+    return match.group(1) if match else None
+
+
+@lru_cache(maxsize=4096)
+def canonical(query: str) -> str:
+    return zip_code(query) or get_index().canonical(query)
+
+
+@lru_cache(maxsize=4096)
+def canonical_key(query: str) -> str:
+    """canonical() reduced to a cache key: 'Youngstown, Ohio' and 'youngstown oh' share one."""
+    return zip_code(query) or get_index().key(query)
+
+
+def geocoder_query(query: str) -> str:
+    return zip_code(query) or get_index().geocoder_query(query)
+
+
+def parse(query: str) -> Location:
+    zip_ = zip_code(query)
+    return Location(zip_, None, None) if zip_ else get_index().parse(query)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print(__doc__)
+        return 1
+    for query in argv:
+        print(f"{query!r:<32} -> {canonical(query)!r}  {canonical_key(query)!r}  {parse(query)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+In-memory nearest-neighbour index over lat/lon points
+- Points go into fixed-size grid buckets (~2.5 km, the size of an NWS grid cell),
+  like geohash cells but with the same size in km at any latitude
+- nearest(lat, lon, radius_km) looks only at the buckets the radius touches and
+  returns matches closest first, by great-circle distance; columns wrap at ±180°
+  longitude (the Aleutians) and a radius that reaches a pole scans every column
+- Thread-safe; adding a point is a dict insert
+
+  index = PointIndex()
+  index.add(41.10, -80.65, "youngstown")
+  index.nearest(41.11, -80.66, radius_km=3)   # [(1.39, 41.1, -80.65, 'youngstown')]
+
+Only uses the standard library.
+"""
+
+import math
+import threading
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+CELL_KM = 2.5
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in km."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class PointIndex:
+    def __init__(self, cell_km: float = CELL_KM):
+        self.cell_km = cell_km
+        self._lat_step = cell_km / KM_PER_DEGREE
+        self._buckets = {}    # (row, col) -> {(lat, lon): value}
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def _row(self, lat: float) -> int:
+        return math.floor((lat + 90) / self._lat_step)
+
+    def _lon_step(self, row: int) -> float:
+        # Columns are cell_km wide at the row's middle latitude, so they get wider in
+        # degrees toward the poles and stay about the same size in km
+        middle = (row + 0.5) * self._lat_step - 90
+        return self._lat_step / max(math.cos(math.radians(middle)), 0.01)
+
+    def _columns(self, row: int) -> int:
+        return math.ceil(360 / self._lon_step(row))
+
+    def _col(self, row: int, lon: float) -> int:
+        # Wrap, so 180° and -180° (and anything past them) share a column
+        return math.floor((lon + 180) / self._lon_step(row)) % self._columns(row)
+
+    def add(self, lat: float, lon: float, value):
+        """Store value at (lat, lon), replacing whatever was stored at exactly that point."""
+        row = self._row(lat)
+        key = (row, self._col(row, lon))
+        with self._lock:
+            bucket = self._buckets.setdefault(key, {})
+            if (lat, lon) not in bucket:
+                self.size += 1
+            bucket[(lat, lon)] = value
+
+    def remove(self, lat: float, lon: float):
+        row = self._row(lat)
+        key = (row, self._col(row, lon))
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket and bucket.pop((lat, lon), None) is not None:
+                self.size -= 1
+                if not bucket:
+                    del self._buckets[key]
+
+    def nearest(self, lat: float, lon: float, radius_km: float, limit: int = None):
+        """[(distance_km, lat, lon, value)] within radius_km of (lat, lon), closest first."""
+        reach = math.ceil(radius_km / self.cell_km)
+        row = self._row(lat)
+        # Widest longitude offset of any point within the radius (all of them if it takes in a pole)
+        ratio = math.sin(min(radius_km / EARTH_RADIUS_KM, math.pi / 2)) / max(math.cos(math.radians(lat)), 1e-12)
+        dlon = math.degrees(math.asin(ratio)) if ratio < 1 else 180.0
+        found = []
+        with self._lock:
+            for r in range(max(row - reach, 0), min(row + reach, self._row(90)) + 1):
+                columns = self._columns(r)
+                span = math.ceil(dlon / self._lon_step(r)) + 1
+                if 2 * span + 1 >= columns:
+                    cols = range(columns)
+                else:
+                    col = self._col(r, lon)
+                    cols = (c % columns for c in range(col - span, col + span + 1))
+                for c in cols:
+                    bucket = self._buckets.get((r, c))
+                    if bucket:
+                        found.extend((plat, plon, value) for (plat, plon), value in bucket.items())
+        matches = []
+        for plat, plon, value in found:
+            distance = haversine_km(lat, lon, plat, plon)
+            if distance <= radius_km:
+                matches.append((distance, plat, plon, value))
+        matches.sort(key=lambda m: m[0])
+        return matches[:limit] if limit else matches
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Forecast providers with health tracking, hedging and fallback
+- One Provider interface over the NWS API (weathery.py) and the Wunderground
+  scraper (bs4_weather.py); both return (location, [ForecastPeriod])
+- Each provider keeps an EWMA of its latency and error rate; a provider that fails
+  several times in a row is taken out of rotation for a cool-down period
+- FallbackEngine sends each query to the best-looking healthy provider (fastest,
+  then cheapest), starts the next one if the first hasn't answered within the
+  hedge budget, and takes whichever succeeds first. A failure moves straight on
+  to the next provider.
+
+Usage:
+  python providers.py 44512 "Youngstown, OH"
+  python providers.py --hedge-after 0.5 44512
+
+Dependencies: requests, geopy, beautifulsoup4 (via weathery / bs4_weather)
+"""
+
+import sys
+import time
+import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+EWMA_ALPHA = 0.2          # weight of the newest sample
+HEDGE_AFTER = 1.5         # seconds to wait on one provider before starting the next
+TRIP_AFTER = 3            # consecutive failures that take a provider out of rotation
+COOL_DOWN = 60.0          # seconds it stays out before it gets another try
+ERROR_PENALTY = 4.0       # how much the error rate inflates a provider's latency score
+
+
+class ProviderError(Exception):
+    """A provider answered, but without a usable forecast."""
+
+
+class Provider:
+    name = "provider"
+    cost = 1          # relative cost; the cheaper provider goes first until we have numbers
+    typical = 1.0     # assumed latency (s) before the first sample
+
+    def __init__(self):
+        self.latency = None       # EWMA seconds, successful calls only
+        self.error_rate = 0.0     # EWMA of 0 (ok) / 1 (failed)
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+        self._lock = threading.Lock()
+
+    def fetch(self, query: str):
+        """(location, [ForecastPeriod]) for query; raises on any failure."""
+        raise NotImplementedError
+
+    def record(self, elapsed: float, ok: bool):
+        with self._lock:
+            self.calls += 1
+            self.error_rate += EWMA_ALPHA * ((0.0 if ok else 1.0) - self.error_rate)
+            if ok:
+                self.latency = elapsed if self.latency is None else \
+                    self.latency + EWMA_ALPHA * (elapsed - self.latency)
+                self.consecutive_failures = 0
+                self.down_until = 0.0
+            else:
+                self.failures += 1
+                self.consecutive_failures += 1
+                if self.consecutive_failures >= TRIP_AFTER:
+                    self.down_until = time.monotonic() + COOL_DOWN
+
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def score(self) -> float:
+        """Expected seconds to a good answer; lower is better."""
+        latency = self.typical if self.latency is None else self.latency
+        return latency * (1 + ERROR_PENALTY * self.error_rate)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "latency_ms": None if self.latency is None else round(self.latency * 1000, 1),
+            "error_rate": round(self.error_rate, 3),
+            "healthy": self.healthy(),
+        }
+
+
+class NwsProvider(Provider):
+    """api.weather.gov through weathery's cached geocode -> points -> forecast chain."""
+    name = "nws"
+    cost = 1
+    typical = 0.5
+
+    def fetch(self, query: str):
+        import weathery
+        result = weathery.forecast_query(query)
+        if result["error"]:
+            raise ProviderError(result["error"])
+        return result["location"], weathery.forecast_records(result["periods"])
+
+
+class WundergroundProvider(Provider):
+    """Weather Underground pages through bs4_weather.WeatherScraper (a much heavier fetch)."""
+    name = "wunderground"
+    cost = 10
+    typical = 2.0
+
+    def __init__(self, scraper=None):
+        super().__init__()
+        self._scraper = scraper
+
+    @property
+    def scraper(self):
+        if self._scraper is None:
+            from bs4_weather import WeatherScraper
+            self._scraper = WeatherScraper()
+        return self._scraper
+
+    def fetch(self, query: str):
+        location, forecast_data = self.scraper.fetch_forecast(query)
+        if not forecast_data:
+            raise ProviderError("no forecast found on the page")
+        return location or query, self.scraper.to_records(forecast_data)
+
+
+class FallbackEngine:
+    def __init__(self, providers=None, hedge_after: float = HEDGE_AFTER, max_workers: int = 8):
+        self.providers = list(providers) if providers else [NwsProvider(), WundergroundProvider()]
+        self.hedge_after = hedge_after
+        self.pool = ThreadPoolExecutor(max_workers, thread_name_prefix="provider")
+        self.hedged = 0                                   # queries that started a second provider
+        self.wins = {p.name: 0 for p in self.providers}   # which provider answered
+
+    def ranked(self):
+        """Providers in the order we'd try them: healthy first, then best score, then cheapest."""
+        return sorted(self.providers, key=lambda p: (not p.healthy(), p.score(), p.cost))
+
+    def _attempt(self, provider: Provider, query: str):
+        start = time.perf_counter()
+        try:
+            result = provider.fetch(query)
+        except Exception:
+            provider.record(time.perf_counter() - start, ok=False)
+            raise
+        provider.record(time.perf_counter() - start, ok=True)
+        return result
+
+    def forecast(self, query: str) -> dict:
+        """Forecast for query from whichever provider answers first.
+
+        Returns a dict with query, location, periods ([ForecastPeriod]), provider and
+        error; errors lists what each failed provider said.
+        """
+        waiting = self.ranked()
+        pending = {}
+        errors = {}
+
+        def start_next():
+            provider = waiting.pop(0)
+            pending[self.pool.submit(self._attempt, provider, query)] = provider
+
+        start_next()
+        while pending:
+            done, _ = wait(pending, timeout=self.hedge_after if waiting else None,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                # Over budget: hedge with the next provider, keep waiting on both
+                self.hedged += 1
+                start_next()
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    location, periods = future.result()
+                except Exception as e:
+                    errors[provider.name] = str(e) or type(e).__name__
+                    continue
+                self.wins[provider.name] += 1
+                return {"query": query, "location": location, "periods": periods,
+                        "provider": provider.name, "error": None, "errors": errors}
+            if waiting and not pending:
+                start_next()
+        return {"query": query, "location": None, "periods": None, "provider": None,
+                "error": "Every provider failed.", "errors": errors}
+
+    def stats(self) -> dict:
+        return {
+            "hedged": self.hedged,
+            "wins": dict(self.wins),
+            "providers": {p.name: p.stats() for p in self.providers},
+        }
+
+    def close(self):
+        # Don't wait for losing hedged calls; their results only update the stats
+        self.pool.shutdown(wait=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Forecast with NWS, falling back to Wunderground.")
+    parser.add_argument("queries", nargs="+", metavar="QUERY", help="ZIP code or 'city, state'")
+    parser.add_argument("--hedge-after", type=float, default=HEDGE_AFTER,
+                        help="seconds before also asking the next provider")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write periods to FILE ('-' for stdout; .ndjson/.csv/.parquet/.arrow) instead")
+    args = parser.parse_args(argv)
+
+    sink = None
+    if args.output:
+        from forecast_export import open_sink
+        sink = open_sink(args.output)
+    engine = FallbackEngine(hedge_after=args.hedge_after)
+    failures = 0
+    try:
+        for query in args.queries:
+            result = engine.forecast(query)
+            if result["error"]:
+                failures += 1
+                print(f"\n{query}: {result['error']} {result['errors']}", file=sys.stderr)
+                continue
+            if sink:
+                sink.write(result["location"], result["periods"])
+                continue
+            print(f"\n{result['location']} (from {result['provider']})")
+            for p in result["periods"]:
+                temps = " / ".join(f"{t:g}°{p.unit}" for t in (p.high, p.low) if t is not None)
+                print(f"  {p.name:<18} {temps:<14} {p.condition}")
+    finally:
+        if sink:
+            sink.close()
+        print(json.dumps(engine.stats()), file=sys.stderr)
+        engine.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Rate limiting and retry helpers for the weather scripts
+- TokenBucket: a thread-safe token bucket shared by every worker hitting one host,
+  so concurrent threads split the request budget instead of each bursting on its own
+- A 429's Retry-After pauses the whole bucket, not just the thread that got it
+- RetryPolicy: jittered exponential backoff ("full jitter") with a cap; a server's
+  Retry-After is honored in full, and one longer than max_retry_after means give up
+
+Only uses the standard library.
+"""
+
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        """Allow `rate` requests per second on average, with bursts of up to `burst`."""
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.throttled_seconds = 0.0  # total time callers spent waiting here
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available. Returns how long we waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    self.throttled_seconds += waited
+                    return waited
+                else:
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for `seconds` (e.g. after a 429 with Retry-After)."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+class RetryPolicy:
+    def __init__(self, max_retries: int = 4, base: float = 0.5, cap: float = 30.0,
+                 retry_statuses=(429, 502, 503, 504), max_retry_after: float = 300.0):
+        self.max_retries = max_retries
+        self.base = base
+        self.cap = cap   # for our own backoff only; Retry-After isn't capped
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for retry number `attempt` (0-based)."""
+        return random.uniform(0, min(self.cap, self.base * (2 ** attempt)))
+
+    def delay(self, attempt: int, retry_after=None):
+        """Seconds to wait before the next try; a server-sent Retry-After wins.
+
+        Returns None when Retry-After asks for longer than max_retry_after: retrying
+        sooner than the server allows would only be refused again, so give up instead.
+        """
+        hinted = parse_retry_after(retry_after)
+        if hinted is not None:
+            if self.max_retry_after is not None and hinted > self.max_retry_after:
+                return None
+            # Small jitter so paused workers don't all stampede at the same instant
+            return hinted + random.uniform(0, self.base)
+        return self.backoff(attempt)
+
+
+def parse_retry_after(value):
+    """Retry-After is either delta-seconds or an HTTP date. Returns seconds or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Bulk Weather Underground scraping with parsing spread over processes
+- Page fetches run concurrently in a thread pool (they're I/O, the GIL doesn't matter)
+- Raw page bytes go to a ProcessPoolExecutor of parser processes, so the
+  BeautifulSoup / extract_* CPU work runs on every core instead of one
+- Each parser process is warmed once (bs4, lxml and the fast filter loaded) and
+  keeps its own learned extraction strategies between pages
+- Workers send back (location, [ForecastPeriod]), never soup trees, so very
+  little crosses the process boundary
+
+  python scrape_batch.py zips.txt
+  python scrape_batch.py zips.txt --parse-workers 8 --output forecasts.parquet
+
+Dependencies: requests, beautifulsoup4 (lxml recommended) via bs4_weather.py
+"""
+
+import os
+import sys
+import queue
+import argparse
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from bs4_weather import WeatherScraper
+
+FETCH_WORKERS = 16
+MAX_PENDING = 256          # pages fetched or being parsed at once; bounds memory
+
+_parser = None             # this parser process's WeatherScraper
+
+
+def init_parser(parse_mode=None):
+    """Parser process initializer: build the scraper and warm bs4 / lxml once."""
+    global _parser
+    _parser = WeatherScraper(parse_mode=parse_mode)
+    _parser.parse_page(b"<html><body><h1>warm-up</h1></body></html>")
+
+
+def parse_records(content: bytes):
+    """Runs in a parser process: page bytes -> (location, [ForecastPeriod])."""
+    if _parser is None:
+        init_parser()
+    location, forecast_data = _parser.parse_page(content)
+    return location, _parser.to_records(forecast_data)
+
+
+def parser_pool(workers: int = None, parse_mode: str = None) -> ProcessPoolExecutor:
+    """Warm parser processes. Uses forkserver/spawn so fetch threads are never forked mid-request."""
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(workers or os.cpu_count(), mp_context=context,
+                               initializer=init_parser, initargs=(parse_mode,))
+
+
+def parse_pages(pages, workers: int = None, parse_mode: str = None):
+    """Parse many page bytes in parallel; returns [(location, [ForecastPeriod])] in input order."""
+    with parser_pool(workers, parse_mode) as pool:
+        return list(pool.map(parse_records, pages, chunksize=4))
+
+
+def run_scrape_batch(queries, fetch_workers: int = FETCH_WORKERS, parse_workers: int = None,
+                     parse_mode: str = None, max_pending: int = MAX_PENDING):
+    """Scrape many locations: threads fetch, parser processes parse.
+
+    Yields one dict per query (query, location, periods, error) in completion order,
+    like weathery.run_batch.
+    """
+    scraper = WeatherScraper(parse_mode=parse_mode)
+    results = queue.Queue()
+
+    def finish(query, location=None, periods=None, error=None):
+        results.put({"query": query, "location": location, "periods": periods, "error": error})
+
+    def parsed(query, future):
+        try:
+            location, periods = future.result()
+        except Exception as e:
+            finish(query, error=f"Error parsing weather data: {e}")
+            return
+        if periods:
+            finish(query, location=location, periods=periods)
+        else:
+            finish(query, location=location, error="No forecast found on the page.")
+
+    def fetch(query):
+        try:
+            content = scraper.fetch_location(query, scraper.fetch_page)
+        except Exception as e:
+            finish(query, error=f"Error fetching data: {e}")
+            return
+        try:
+            parse_pool.submit(parse_records, content).add_done_callback(lambda f: parsed(query, f))
+        except Exception as e:
+            finish(query, error=f"Error parsing weather data: {e}")
+
+    queries = iter(queries)
+    with parser_pool(parse_workers, parse_mode) as parse_pool, \
+         ThreadPoolExecutor(fetch_workers, thread_name_prefix="wu-fetch") as fetch_pool:
+        in_flight = 0
+        exhausted = False
+        while True:
+            while not exhausted and in_flight < max_pending:
+                query = next(queries, None)
+                if query is None:
+                    exhausted = True
+                    break
+                fetch_pool.submit(fetch, query)
+                in_flight += 1
+            if in_flight == 0:
+                break
+            yield results.get()
+            in_flight -= 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape Weather Underground forecasts for many locations.")
+    parser.add_argument("queries", help="file with one ZIP / 'city, state' per line ('-' for stdin)")
+    parser.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS)
+    parser.add_argument("--parse-workers", type=int, default=None, help="parser processes (default: one per core)")
+    parser.add_argument("--parse-mode", choices=("fast", "full"))
+    parser.add_argument("--output", metavar="FILE",
+                        help="write periods to FILE ('-' for stdout; .ndjson/.csv/.parquet/.arrow) instead")
+    args = parser.parse_args(argv)
+
+    from weathery import read_queries
+    sink = None
+    if args.output:
+        from forecast_export import open_sink
+        sink = open_sink(args.output)
+    src = sys.stdin if args.queries == "-" else open(args.queries, encoding="utf-8")
+    failures = 0
+    try:
+        for result in run_scrape_batch(read_queries(src), args.fetch_workers, args.parse_workers, args.parse_mode):
+            if result["error"]:
+                failures += 1
+                print(f"\n{result['query']}: {result['error']}", file=sys.stderr)
+            elif sink:
+                sink.write(result["location"], result["periods"])
+            else:
+                print(f"\n{result['location']} ({result['query']})")
+                for p in result["periods"]:
+                    temps = " / ".join(f"{t:g}°{p.unit}" for t in (p.high, p.low) if t is not None)
+                    print(f"  {p.name:<18} {temps:<14} {p.condition}")
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if sink:
+            sink.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
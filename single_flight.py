@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Single-flight request coalescing
+- The first caller for a key runs the real (upstream) call
+- Anyone asking for the same key while it's running waits for that same result
+  instead of making their own call
+- Works for threads (do) and asyncio (do_async) at the same time; both kinds of
+  caller share one in-flight table, so a coroutine can join a thread's call and
+  vice versa
+- Counters: calls actually made vs. calls saved by sharing
+
+Only uses the standard library (asyncio is imported by the first do_async call).
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.calls = 0    # real calls made (one per burst of identical requests)
+        self.shared = 0   # callers that got a result without making a call
+        self._lock = threading.Lock()
+        self._in_flight = {}  # key -> concurrent.futures.Future
+
+    def _join_or_lead(self, key):
+        """(future, is_leader). The leader must resolve the future and call _finish."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = self._in_flight[key] = Future()
+            self.calls += 1
+            return future, True
+
+    def _finish(self, key, future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def pending(self, key) -> bool:
+        """True if a call for key is running right now."""
+        with self._lock:
+            return key in self._in_flight
+
+    def do(self, key, fn, *args, **kwargs):
+        """Return fn(*args, **kwargs), sharing the result with concurrent callers of the same key."""
+        future, leader = self._join_or_lead(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._finish(key, future)
+
+    async def do_async(self, key, fn, *args, executor=None):
+        """Async version of do(). fn may be a coroutine function or a blocking callable
+        (run in `executor`, default the loop's).
+
+        Cancelling one waiter (leader included) doesn't cancel the shared call.
+        """
+        import asyncio  # only async callers pay for it
+        future, leader = self._join_or_lead(key)
+        if leader:
+            loop = asyncio.get_running_loop()
+            if asyncio.iscoroutinefunction(fn):
+                work = loop.create_task(fn(*args))
+            else:
+                work = loop.run_in_executor(executor, fn, *args)
+
+            def settle(done):
+                if done.cancelled():
+                    future.cancel()
+                elif done.exception() is not None:
+                    future.set_exception(done.exception())
+                else:
+                    future.set_result(done.result())
+                self._finish(key, future)
+            work.add_done_callback(settle)
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def __len__(self):
+        """Number of calls running right now."""
+        with self._lock:
+            return len(self._in_flight)
+
+    def stats(self) -> dict:
+        requested = self.calls + self.shared
+        return {
+            "calls": self.calls,
+            "saved": self.shared,
+            "saved_rate": (self.shared / requested) if requested else 0.0,
+        }
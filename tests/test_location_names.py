@@ -0,0 +1,112 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import location_names  # noqa: E402
+from location_names import LocationIndex, Location  # noqa: E402
+
+
+@pytest.fixture
+def index():
+    """The bundled cities only, as when no ZIP index has been built."""
+    return LocationIndex()
+
+
+@pytest.fixture
+def full_index():
+    """Stands in for an index loaded from the ZIP file."""
+    index = LocationIndex()
+    for city, state in (("Youngstown", "OH"), ("Springfield", "IL"), ("Springfield", "MO"),
+                        ("Great Falls", "MT"), ("Mount Vernon", "OH")):
+        index.add_city(city, state)
+    index.complete = True
+    return index
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Youngstown, OH", "Youngstown, OH"),
+    ("youngstown oh", "Youngstown, OH"),
+    ("Youngstown,  Ohio", "Youngstown, OH"),
+    ("Billings, MT", "Billings, MT"),
+    ("billings montana", "Billings, MT"),
+    ("Great Falls MT", "Great Falls, MT"),
+    ("Indiana PA", "Indiana, PA"),
+    ("ft worth tx", "Fort Worth, TX"),
+    ("st louis mo", "Saint Louis, MO"),
+])
+def test_abbreviations(index, query, expected):
+    assert index.canonical(query) == expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("West Virginia", Location(None, None, "WV")),
+    ("district of columbia", Location(None, None, "DC")),
+    ("Washington DC", Location(None, "Washington", "DC")),
+    ("washington", Location(None, None, "WA")),
+    ("new york", Location(None, "New York", "NY")),
+    ("Albany New York", Location(None, "Albany", "NY")),
+    ("Charleston, West Virginia", Location(None, "Charleston", "WV")),
+    ("Raleigh North Carolina", Location(None, "Raleigh", "NC")),
+])
+def test_two_word_states(index, query, expected):
+    assert index.parse(query) == expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Coeur d'Alene, ID", "Coeur d'Alene, ID"),
+    ("Winston-Salem NC", "Winston-Salem, NC"),
+    ("winston-salem nc", "Winston-Salem, NC"),
+    ("St. Louis,  MO", "Saint Louis, MO"),
+    ("44512-1234", "44512"),
+])
+def test_punctuation(index, query, expected):
+    assert index.canonical(query) == expected
+
+
+@pytest.mark.parametrize("query", ["São Paulo", "Zürich", "Montréal, QC"])
+def test_non_ascii_kept(index, query):
+    assert index.canonical(query) == query
+    assert index.geocoder_query(query) == query
+
+
+def test_non_ascii_keys_casefold(index):
+    assert index.key("ZÜRICH") == index.key("zürich") == "zürich"
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Billings MT", "Billings, Montana"),
+    ("Youngstown, OH", "youngstown ohio"),
+    ("Winston-Salem NC", "winston salem, north carolina"),
+    ("Mt Vernon, OH", "Mount Vernon OH"),
+])
+def test_spellings_share_a_key(index, a, b):
+    assert index.key(a) == index.key(b)
+
+
+def test_state_filled_in_only_with_full_index(index, full_index):
+    assert index.parse("Springfield") == Location(None, "Springfield", None)
+    assert index.parse("youngstown") == Location(None, "Youngstown", None)
+    assert full_index.parse("youngstown") == Location(None, "Youngstown", "OH")
+    # Ambiguous even with every city known
+    assert full_index.parse("Springfield") == Location(None, "Springfield", None)
+
+
+def test_unrecognized_input_goes_to_geocoder_as_typed(index):
+    assert index.geocoder_query("  London UK ") == "London UK"
+    assert index.geocoder_query("youngstown ohio") == "Youngstown, OH"
+
+
+def test_zip_never_builds_index(monkeypatch):
+    location_names.reset_index()
+    monkeypatch.setattr(location_names, "get_index", lambda: pytest.fail("index built for a ZIP"))
+    assert location_names.canonical_key("44512-0001") == "44512"
+    assert location_names.parse("44512") == Location("44512", None, None)
+    location_names.reset_index()
+
+
+def test_zip_index_path_read_at_call_time(monkeypatch, tmp_path):
+    monkeypatch.setattr(location_names, "ZIP_INDEX_PATH", str(tmp_path / "missing.bin"))
+    assert not LocationIndex.from_zip_index().complete
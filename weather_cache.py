@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Small on-disk key/value cache backed by SQLite
+- Values are stored as JSON, so anything json.dumps can handle works
+- Entries expire after a TTL (negative results can get their own, shorter TTL)
+- Total size is capped; the least recently used entries are evicted first. Eviction
+  runs in batches (every EVICT_EVERY writes, or once the cap is ~1.5% exceeded), not
+  on every write, so a large cache may briefly hold a few entries over the cap
+- Hit/miss counters so callers can see how much upstream traffic it saves
+
+Only uses the standard library.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from email.utils import parsedate_to_datetime
+
+# Returned by get() when a key is absent or expired. Cached values may
+# legitimately be None (a remembered "no result"), so None can't mean "miss".
+MISSING = object()
+
+EVICT_EVERY = 256   # writes between sweeps for expired rows
+
+
+class SqliteCache:
+    def __init__(self, path: str, ttl: float, max_entries: int = 10000, negative_ttl: float = None):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.max_entries = max_entries
+        # Room over the cap before an LRU sweep; 0 for small caches, so they stay exact
+        self.slack = max_entries // 64
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # One connection shared by all threads; the lock keeps access serialized
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_expires ON entries(expires)")
+        self._db.commit()
+        # Upper bound on the row count (replacing a key counts as adding one) and
+        # writes since the last sweep; set() sweeps when either gets too big
+        self._rows = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        self._writes = 0
+
+    def get(self, key: str):
+        """Return the cached value for key, or MISSING if absent or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._db.commit()
+                self.misses += 1
+                return MISSING
+            self._db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value, ttl: float = None):
+        """Store value under key. None is cached as a negative result."""
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            self._rows += 1
+            self._writes += 1
+            if self._rows > self.max_entries + self.slack or self._writes >= EVICT_EVERY:
+                self._evict()
+            self._db.commit()
+
+    def contains(self, key: str) -> bool:
+        """Is there an unexpired entry for key? (Doesn't count as a hit or miss.)"""
+        with self._lock:
+            row = self._db.execute("SELECT 1 FROM entries WHERE key = ? AND expires > ?",
+                                   (key, time.time())).fetchone()
+        return row is not None
+
+    def items(self):
+        """Every unexpired (key, value), without touching the LRU order or the counters."""
+        with self._lock:
+            rows = self._db.execute("SELECT key, value FROM entries WHERE expires > ?", (time.time(),)).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def delete(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+            self._rows = 0
+
+    def _evict(self):
+        # Caller holds the lock. Drop expired rows first, then the LRU overflow.
+        self._db.execute("DELETE FROM entries WHERE expires <= ?", (time.time(),))
+        count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+            count -= overflow
+        self._rows = count
+        self._writes = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "entries": len(self),
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def ttl_from_headers(headers, default: float) -> float:
+    """Work out how long a response may be cached from Cache-Control / Expires.
+
+    Returns seconds (0 means don't cache). Falls back to default if the server says nothing.
+    """
+    cache_control = (headers.get("Cache-Control") or "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0
+    age = 0.0
+    try:
+        age = float(headers.get("Age") or 0)
+    except ValueError:
+        pass
+    match = re.search(r"(?:s-maxage|max-age)\s*=\s*(\d+)", cache_control)
+    if match:
+        return max(0.0, float(match.group(1)) - age)
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            expires_at = parsedate_to_datetime(expires).timestamp()
+        except (TypeError, ValueError):
+            return 0  # an invalid Expires means "already expired"
+        # Measure against the server's clock when it tells us what time it is
+        now = time.time()
+        if headers.get("Date"):
+            try:
+                now = parsedate_to_datetime(headers["Date"]).timestamp()
+            except (TypeError, ValueError):
+                pass
+        return max(0.0, expires_at - now)
+    return default
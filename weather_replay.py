@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Record/replay harness for the weather scripts, so they can run without the internet
+- A local HTTP server stands in for api.weather.gov, Nominatim and Wunderground:
+    http://127.0.0.1:PORT/nws/...        -> https://api.weather.gov/...
+    http://127.0.0.1:PORT/nominatim/...  -> https://nominatim.openstreetmap.org/...
+    http://127.0.0.1:PORT/wu/...         -> https://www.wunderground.com/...
+- record mode forwards to the real upstream and saves each response as a fixture
+- replay mode serves fixtures only, with configurable latency and injected 429s
+- Upstream URLs inside bodies/redirects are rewritten to the local server, so
+  follow-up calls (points -> forecast URL) stay local too
+
+Record some fixtures (needs the network once):
+  python weather_replay.py record 44512 "Youngstown, OH"
+Serve them:
+  python weather_replay.py serve --latency 0.05 --throttle 0.1
+
+Dependencies: requests (record mode only)
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import random
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+UPSTREAMS = {
+    "nws": "https://api.weather.gov",
+    "nominatim": "https://nominatim.openstreetmap.org",
+    "wu": "https://www.wunderground.com",
+}
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fixtures")
+# Headers that describe the original transfer, not the (decoded) body we store
+DROP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection", "keep-alive"}
+
+
+def fixture_key(url: str) -> str:
+    """The URL with its query parameters sorted, so parameter order doesn't matter."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{parts.scheme}://{parts.netloc}{parts.path}" + (f"?{query}" if query else "")
+
+
+def fixture_path(fixtures_dir: str, url: str) -> str:
+    return os.path.join(fixtures_dir, hashlib.sha1(fixture_key(url).encode()).hexdigest()[:20] + ".json")
+
+
+def save_fixture(fixtures_dir: str, url: str, status: int, headers: dict, body: bytes):
+    os.makedirs(fixtures_dir, exist_ok=True)
+    record = {
+        "url": url,
+        "status": status,
+        "headers": {k: v for k, v in headers.items() if k.lower() not in DROP_HEADERS},
+        "body": base64.b64encode(body).decode("ascii"),
+    }
+    with open(fixture_path(fixtures_dir, url), "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=1)
+
+
+def load_fixture(fixtures_dir: str, url: str):
+    """(status, headers, body) for url, or None if it was never recorded."""
+    try:
+        with open(fixture_path(fixtures_dir, url), encoding="utf-8") as f:
+            record = json.load(f)
+    except FileNotFoundError:
+        return None
+    return record["status"], record["headers"], base64.b64decode(record["body"])
+
+
+class ReplayServer:
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR, mode: str = "replay", latency: float = 0.0,
+                 jitter: float = 0.0, throttle: float = 0.0, retry_after: str = "1",
+                 host: str = "127.0.0.1", port: int = 0, seed: int = None):
+        if mode not in ("replay", "record"):
+            raise ValueError("mode must be 'replay' or 'record'")
+        self.fixtures_dir = fixtures_dir
+        self.mode = mode
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle = throttle          # fraction of requests answered with 429
+        self.retry_after = retry_after
+        self.requests = 0
+        self.throttled = 0
+        self.missing = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, name: str) -> str:
+        """Local stand-in for one of the UPSTREAMS, e.g. url_for('nws')."""
+        return f"{self.base_url}/{name}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def upstream_url(self, path: str):
+        """'/nws/points/1,2' -> 'https://api.weather.gov/points/1,2' (None if unknown prefix)."""
+        name, _, rest = path.lstrip("/").partition("/")
+        base = UPSTREAMS.get(name)
+        return f"{base}/{rest}" if base else None
+
+    def localize(self, data: bytes) -> bytes:
+        """Rewrite upstream base URLs to point back at this server."""
+        for name, base in UPSTREAMS.items():
+            data = data.replace(base.encode(), self.url_for(name).encode())
+        return data
+
+    def _fetch(self, url: str):
+        if self.mode == "record":
+            import requests
+            r = requests.get(url, headers={"User-Agent": "weather-replay-recorder/1.0"},
+                             allow_redirects=False, timeout=30)
+            save_fixture(self.fixtures_dir, url, r.status_code, dict(r.headers), r.content)
+            return r.status_code, dict(r.headers), r.content
+        return load_fixture(self.fixtures_dir, url)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    throttle = server._random.random() < server.throttle
+                    delay = server.latency + server._random.uniform(0, server.jitter)
+                if delay:
+                    time.sleep(delay)
+                if throttle:
+                    with server._lock:
+                        server.throttled += 1
+                    return self._send(429, {"Retry-After": server.retry_after}, b"")
+
+                url = server.upstream_url(self.path)
+                found = server._fetch(url) if url else None
+                if found is None:
+                    with server._lock:
+                        server.missing += 1
+                    return self._send(404, {"Content-Type": "text/plain"}, f"no fixture for {url}\n".encode())
+                status, headers, body = found
+                headers = {k: v for k, v in headers.items() if k.lower() not in DROP_HEADERS}
+                if "Location" in headers:
+                    location = headers["Location"]
+                    if location.startswith("/"):
+                        # relative redirect: keep it under this upstream's prefix
+                        location = "/" + self.path.lstrip("/").partition("/")[0] + location
+                    headers["Location"] = server.localize(location.encode()).decode()
+                self._send(status, headers, server.localize(body))
+
+            def _send(self, status, headers, body):
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                pass
+
+        return Handler
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "throttled": self.throttled, "missing": self.missing}
+
+
+@contextmanager
+def pointed_at(server: ReplayServer, cache_dir: str = None):
+    """Point weathery and WeatherScraper at the replay server for the duration of the block.
+
+    If cache_dir is given, weathery's on-disk caches live there instead of ~/.cache,
+    so runs start cold and don't touch the real caches.
+    """
+    import weathery
+    import bs4_weather
+
+    saved = {name: getattr(weathery, name) for name in (
+        "NWS_BASE", "NWS_HOST", "NOMINATIM_DOMAIN", "NOMINATIM_SCHEME",
+        "GEOCODE_CACHE_PATH", "POINTS_CACHE_PATH", "FORECAST_CACHE_PATH", "ZIP_INDEX_PATH")}
+    import location_names
+
+    saved_wu = bs4_weather.WeatherScraper.BASE_URL, bs4_weather.URL_CACHE_PATH, location_names.ZIP_INDEX_PATH
+    try:
+        weathery.NWS_BASE = server.url_for("nws")
+        weathery.NWS_HOST = server.url_for("nws").split("/")[2].split(":")[0]
+        weathery.NOMINATIM_DOMAIN = server.url_for("nominatim").split("://", 1)[1]
+        weathery.NOMINATIM_SCHEME = "http"
+        if cache_dir:
+            weathery.GEOCODE_CACHE_PATH = os.path.join(cache_dir, "geocode.sqlite")
+            weathery.POINTS_CACHE_PATH = os.path.join(cache_dir, "points.sqlite")
+            weathery.FORECAST_CACHE_PATH = os.path.join(cache_dir, "forecast.sqlite")
+            weathery.ZIP_INDEX_PATH = os.path.join(cache_dir, "no-zip-index.bin")
+            bs4_weather.URL_CACHE_PATH = os.path.join(cache_dir, "wu_urls.sqlite")
+            location_names.ZIP_INDEX_PATH = weathery.ZIP_INDEX_PATH
+        weathery.reset_state()
+        bs4_weather.reset_url_cache()
+        location_names.reset_index()
+        bs4_weather.WeatherScraper.BASE_URL = server.url_for("wu")
+        yield server
+    finally:
+        for name, value in saved.items():
+            setattr(weathery, name, value)
+        weathery.reset_state()
+        bs4_weather.reset_url_cache()
+        location_names.reset_index()
+        bs4_weather.WeatherScraper.BASE_URL, bs4_weather.URL_CACHE_PATH, location_names.ZIP_INDEX_PATH = saved_wu
+
+
+def record(locations, fixtures_dir: str = FIXTURES_DIR):
+    """Run both scrapers for each location through a recording server."""
+    import tempfile
+    import weathery
+    import bs4_weather
+
+    with ReplayServer(fixtures_dir, mode="record") as server, tempfile.TemporaryDirectory() as tmp:
+        with pointed_at(server, cache_dir=tmp):
+            for location in locations:
+                geocoded = weathery.geocode(location)
+                points = weathery.get_points_metadata(*geocoded[:2]) if geocoded else None
+                forecast_url = (points or {}).get("properties", {}).get("forecast")
+                periods = weathery.get_forecast(forecast_url) if forecast_url else None
+                name, days = bs4_weather.WeatherScraper().scrape_forecast(location)
+                print(f"{location}: NWS {len(periods or [])} periods, Wunderground {len(days or [])} days")
+        print(f"Recorded {server.requests} responses into {fixtures_dir}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record or replay weather API responses.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="fetch live responses for LOCATIONs and save fixtures")
+    rec.add_argument("locations", nargs="+")
+    rec.add_argument("--fixtures", default=FIXTURES_DIR)
+    srv = sub.add_parser("serve", help="serve recorded fixtures")
+    srv.add_argument("--fixtures", default=FIXTURES_DIR)
+    srv.add_argument("--port", type=int, default=8765)
+    srv.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    srv.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    srv.add_argument("--throttle", type=float, default=0.0, help="fraction of requests answered with 429")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record(args.locations, args.fixtures)
+        return 0
+
+    server = ReplayServer(args.fixtures, latency=args.latency, jitter=args.jitter,
+                          throttle=args.throttle, port=args.port)
+    print(f"Serving fixtures from {args.fixtures} at {server.base_url} (Ctrl+C to stop)")
+    for name, base in UPSTREAMS.items():
+        print(f"  {server.url_for(name)}/...  ->  {base}/...")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\n{server.stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
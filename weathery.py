@@ -4,70 +4,438 @@ Simple NWS 7-day forecast CLI
 - Input: ZIP code or "city, state"
 - Output: Text 7-day forecast from api.weather.gov
 
+Batch mode:
+  python weathery.py --batch zips.txt
+  (one ZIP or "city, state" per line; results print as they finish)
+  python weathery.py --batch zips.txt --output forecasts.ndjson   (or .csv / .parquet / .arrow)
+
+Dense batches (many ZIPs a few km apart) can borrow a cached forecast from the
+nearest point within --nearby-km instead of looking up their own:
+  python weathery.py --batch zips.txt --nearby-km 3
+
+Service mode (stays resident, keeps caches and connections warm):
+  python -m weathery serve --port 8080 --nearby-km 3
+  curl 'http://127.0.0.1:8080/forecast?q=44512'
+
 Dependencies: requests, geopy
   pip install requests geopy
+requests and geopy are imported only when a lookup actually has to go to the
+network, so cached and offline-index answers start fast.
 """
 
+import os
+import re
 import sys
 import time
-import requests
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderUnavailable, GeocoderServiceError, GeocoderTimedOut
+import atexit
+import threading
+import argparse
+import instrumentation
+import location_names
+from weather_cache import SqliteCache, MISSING, ttl_from_headers
+from forecast_model import ForecastPeriod, ForecastBatch
+from zip_index import ZipIndex
+from single_flight import SingleFlight
 
 # IMPORTANT: Set a real contact address per NWS API policy:
 CONTACT_EMAIL = "you@example.com"   # <-- put your contact email here
 USER_AGENT = f"nws-7day-cli/1.0 ({CONTACT_EMAIL})"
 
 REQ_TIMEOUT = 12  # seconds
+NWS_HEADERS = {"User-Agent": USER_AGENT, "Accept": "application/geo+json"}
+NWS_BASE = "https://api.weather.gov"
+NWS_HOST = "api.weather.gov"
+# Where geopy sends Nominatim requests (the replay harness points these at a local server)
+NOMINATIM_DOMAIN = "nominatim.openstreetmap.org"
+NOMINATIM_SCHEME = "https"
+# NWS doesn't publish a number; this stays well clear of its throttling in practice.
+NWS_RATE = 5.0   # requests per second, shared by all batch workers
+NWS_BURST = 10
+
+# Batch mode: how many calls each pipeline stage may have in flight at once.
+# Nominatim's usage policy is strict, so geocoding gets the smallest pool.
+GEOCODE_WORKERS = 2
+POINTS_WORKERS = 8
+FORECAST_WORKERS = 8
+MAX_PENDING = 256  # queries admitted into the pipeline but not yet reported
+
+# Geocode cache: the same ZIPs come up again and again, so remember Nominatim's answers.
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "weathery")
+GEOCODE_CACHE_PATH = os.path.join(CACHE_DIR, "geocode.sqlite")
+GEOCODE_CACHE_TTL = 30 * 24 * 3600        # places don't move; a month is plenty
+GEOCODE_NEGATIVE_TTL = 24 * 3600          # but retry unknown queries daily
+GEOCODE_CACHE_MAX_ENTRIES = 50000
+
+# Offline ZIP/city index (build it with: python zip_index.py build US.txt data/zip_index.bin).
+# When present, most queries resolve locally and never reach Nominatim.
+ZIP_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "zip_index.bin")
+ZIP_RE = re.compile(r"^\d{5}$")
+CITY_STATE_RE = re.compile(r"^(.+?)[,\s]+([A-Za-z]{2})$")
+
+# Points cache: the forecast URL for a spot depends only on its NWS office/grid cell.
+POINTS_CACHE_PATH = os.path.join(CACHE_DIR, "points.sqlite")
+POINTS_CACHE_TTL = 7 * 24 * 3600
+POINTS_CACHE_MAX_ENTRIES = 50000
+
+# Forecast cache, keyed by grid cell so nearby ZIPs share one fetch.
+# Entries live as long as NWS's Cache-Control/Expires says; this is the fallback.
+FORECAST_CACHE_PATH = os.path.join(CACHE_DIR, "forecast.sqlite")
+FORECAST_CACHE_DEFAULT_TTL = 15 * 60
+FORECAST_CACHE_MAX_ENTRIES = 20000
+
+# Nearby reuse: a query within this many km of a point whose forecast is still cached
+# gets that forecast instead of its own points + forecast lookups (0 turns it off).
+# Forecasts a couple of km apart are practically the same; --nearby-km sets it.
+NEARBY_KM = 0.0
+POINT_INDEX_SLACK = 1.1   # rebuild the nearby index once it's this far past the points cache size
+
+# https://api.weather.gov/gridpoints/{office}/{x},{y}/forecast
+GRID_URL_RE = re.compile(r"/gridpoints/([A-Z]{3})/(\d+),(\d+)/forecast", re.I)
+
+_nws_client = None
+_zip_index = None      # False once we know there's no index file
+local_geocode_hits = 0
+_geolocator = None
+_geocode_cache = None
+_points_cache = None
+_forecast_cache = None
+_point_index = None
+nearby_hits = 0
+# Counters and the point-index swap are updated from the batch / service worker threads
+_stats_lock = threading.Lock()
+
+# Identical lookups that overlap in time share one upstream call
+geocode_flight = SingleFlight("geocode")      # keyed by normalized query
+points_flight = SingleFlight("points")        # keyed by rounded coordinates
+forecast_flight = SingleFlight("forecast")    # keyed by grid cell / forecast URL
+
+
+def reset_state():
+    """Forget lazily created clients, caches and indexes (e.g. after changing the paths above)."""
+    global _nws_client, _geolocator, _zip_index, _geocode_cache, _points_cache, _forecast_cache, _point_index
+    for cache in (_geocode_cache, _points_cache, _forecast_cache):
+        if cache is not None:
+            cache.close()
+    if _zip_index:
+        _zip_index.close()
+    _nws_client = _geolocator = _zip_index = None
+    _geocode_cache = _points_cache = _forecast_cache = _point_index = None
+
+
+def nws_client():
+    """Shared HTTP client with the NWS rate limit applied (retries/backoff live in the client)."""
+    global _nws_client
+    if _nws_client is None:
+        from http_client import get_client
+        client = get_client()
+        if NWS_HOST not in client.limiters:
+            client.set_rate_limit(NWS_HOST, NWS_RATE, NWS_BURST)
+        _nws_client = client
+    return _nws_client
+
+
+def get_zip_index():
+    """Return the offline ZIP index, or None if it hasn't been built."""
+    global _zip_index
+    if _zip_index is None:
+        _zip_index = ZipIndex(ZIP_INDEX_PATH) if os.path.exists(ZIP_INDEX_PATH) else False
+    return _zip_index or None
+
+
+def geocode_local(query: str):
+    """Resolve a ZIP or 'city, ST' from the offline index. Returns (lat, lon, display) or None."""
+    index = get_zip_index()
+    if index is None:
+        return None
+    query = query.strip()
+    if ZIP_RE.match(query):
+        rec = index.lookup_zip(query)
+        return (rec.lat, rec.lon, f"{rec.city}, {rec.state} {rec.zip}") if rec else None
+    match = CITY_STATE_RE.match(query)
+    if match:
+        return index.resolve(match.group(1), match.group(2))
+    return None
+
+
+def get_geocode_cache():
+    """Return the shared geocode cache, opening it on first use."""
+    global _geocode_cache
+    if _geocode_cache is None:
+        _geocode_cache = SqliteCache(GEOCODE_CACHE_PATH, GEOCODE_CACHE_TTL,
+                                     max_entries=GEOCODE_CACHE_MAX_ENTRIES,
+                                     negative_ttl=GEOCODE_NEGATIVE_TTL)
+    return _geocode_cache
+
+
+def get_points_cache():
+    """Return the shared points (grid cell / forecast URL) cache, opening it on first use."""
+    global _points_cache
+    if _points_cache is None:
+        _points_cache = SqliteCache(POINTS_CACHE_PATH, POINTS_CACHE_TTL, max_entries=POINTS_CACHE_MAX_ENTRIES)
+    return _points_cache
+
+
+def get_forecast_cache():
+    """Return the shared forecast cache, opening it on first use."""
+    global _forecast_cache
+    if _forecast_cache is None:
+        _forecast_cache = SqliteCache(FORECAST_CACHE_PATH, FORECAST_CACHE_DEFAULT_TTL,
+                                      max_entries=FORECAST_CACHE_MAX_ENTRIES)
+    return _forecast_cache
+
+
+def get_point_index():
+    """Spatial index of every cached points answer, loaded from the points cache on first use."""
+    global _point_index
+    if _point_index is None:
+        from point_index import PointIndex
+        index = PointIndex()
+        for coords, points in get_points_cache().items():
+            add_point(index, coords, points)
+        _point_index = index
+    return _point_index
+
+
+def drop_point_index(index):
+    """Forget index (if it's still the current one); the next lookup reloads it from the cache."""
+    global _point_index
+    with _stats_lock:
+        if _point_index is index:
+            _point_index = None
+
+
+def add_point(index, coords: str, points):
+    if points and points.get("properties", {}).get("forecast"):
+        lat, lon = map(float, coords.split(","))
+        index.add(lat, lon, points)
+
+
+def nearby_points(lat: float, lon: float):
+    """(points, distance_km) for the closest cached point within NEARBY_KM whose
+    forecast is still cached, or (None, None)."""
+    global nearby_hits
+    if NEARBY_KM <= 0 or get_points_cache().contains(f"{lat:.4f},{lon:.4f}"):
+        # Off, or this exact point is cached anyway
+        return None, None
+    index = get_point_index()
+    points_cache, forecasts = get_points_cache(), get_forecast_cache()
+    for distance, plat, plon, points in index.nearest(lat, lon, NEARBY_KM):
+        if not points_cache.contains(f"{plat:.4f},{plon:.4f}"):
+            # Expired or evicted from the points cache since it was indexed
+            index.remove(plat, plon)
+        elif forecasts.contains(grid_cell_key(points["properties"]["forecast"])):
+            with _stats_lock:
+                nearby_hits += 1
+            return points, distance
+    return None, None
+
+
+def points_near(lat: float, lon: float):
+    """(points, distance_km): a nearby point's answer when NEARBY_KM allows, else this
+    point's own (distance_km None). points is None if NWS couldn't be reached."""
+    points, distance = nearby_points(lat, lon)
+    if points is None:
+        return get_points_metadata(lat, lon), None
+    return points, distance
+
+
+def grid_cell_key(forecast_url: str) -> str:
+    """Cache key for a forecast URL: 'OFFICE/X,Y' when it names a grid cell, else the URL."""
+    match = GRID_URL_RE.search(forecast_url)
+    if not match:
+        return forecast_url
+    office, x, y = match.groups()
+    return f"{office.upper()}/{int(x)},{int(y)}"
+
+
+def slim_points(points_json) -> dict:
+    """Keep only the parts of a /points response we use, so cache rows stay small."""
+    props = points_json.get("properties", {})
+    keep = ("forecast", "forecastHourly", "forecastGridData", "gridId", "gridX", "gridY", "relativeLocation")
+    return {"properties": {k: props[k] for k in keep if k in props}}
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: 'youngstown ohio' and 'Youngstown, OH' both -> 'youngstown, oh'."""
+    return location_names.canonical_key(query)
 
 def geocode(query: str):
-    """Return (lat, lon, display_name) using Nominatim."""
-    geolocator = Nominatim(user_agent="nws_7day_cli_geocoder")
+    """Return (lat, lon, display_name): offline index, then the cache, then Nominatim."""
+    global local_geocode_hits
+    local = geocode_local(query)
+    if local is None:
+        # 'youngstown ohio' -> 'Youngstown, OH', so every spelling shares one lookup
+        # (input with no recognizable state or city is passed on as typed). Only input
+        # the index missed gets here: the city trie takes a while to build the first time.
+        canonical = location_names.geocoder_query(query)
+        if canonical != query.strip():
+            local = geocode_local(canonical)
+        query = canonical
+    if local:
+        with _stats_lock:
+            local_geocode_hits += 1
+        return local
+
+    return geocode_flight.do(normalize_query(query), geocode_remote, query)
+
+
+def geocode_remote(query: str):
+    """geocode() minus the offline index: the cache, then Nominatim."""
+    cache = get_geocode_cache()
+    key = normalize_query(query)
+    cached = cache.get(key)
+    if cached is not MISSING:
+        return tuple(cached) if cached else None
+
+    result = geocode_nominatim(query)
+    if result is not MISSING:
+        cache.set(key, list(result) if result else None)
+        return result
+    return None
+
+
+def geocode_nominatim(query: str):
+    """Ask Nominatim. Returns a tuple, None for 'no such place', or MISSING on service errors."""
+    global _geolocator
+    from geopy.exc import GeocoderUnavailable, GeocoderServiceError, GeocoderTimedOut
+    if _geolocator is None:
+        from geopy.geocoders import Nominatim
+        _geolocator = Nominatim(user_agent="nws_7day_cli_geocoder", domain=NOMINATIM_DOMAIN,
+                                scheme=NOMINATIM_SCHEME)
+    geolocator = _geolocator
     try:
-        # Try as given first
-        loc = geolocator.geocode(query, addressdetails=True, timeout=REQ_TIMEOUT)
-        # If that failed, try appending 'USA'
-        if not loc:
-            loc = geolocator.geocode(f"{query}, USA", addressdetails=True, timeout=REQ_TIMEOUT)
+        with instrumentation.span("nominatim"):
+            # Try as given first
+            loc = geolocator.geocode(query, addressdetails=True, timeout=REQ_TIMEOUT)
+            # If that failed, try appending 'USA'
+            if not loc:
+                loc = geolocator.geocode(f"{query}, USA", addressdetails=True, timeout=REQ_TIMEOUT)
         if not loc:
             return None
         return (loc.latitude, loc.longitude, loc.address)
     except (GeocoderUnavailable, GeocoderServiceError, GeocoderTimedOut):
-        return None
+        # Don't cache outages as "not found"
+        return MISSING
 
 
 def get_points_metadata(lat: float, lon: float):
-    """Call api.weather.gov/points/{lat},{lon} and return JSON or None."""
-    url = f"https://api.weather.gov/points/{lat:.4f},{lon:.4f}"
+    """Call api.weather.gov/points/{lat},{lon} and return JSON or None.
+
+    Answers are cached by the same rounded coordinates used in the URL, and concurrent
+    calls for the same coordinates share one request.
+    """
+    coords = f"{lat:.4f},{lon:.4f}"
+    return points_flight.do(coords, fetch_points, coords)
+
+
+def fetch_points(coords: str):
+    """The cache, then NWS, for one rounded 'lat,lon' (see get_points_metadata)."""
+    cache = get_points_cache()
+    cached = cache.get(coords)
+    if cached is not MISSING:
+        return cached
+
+    import requests
+    url = f"{NWS_BASE}/points/{coords}"
     try:
-        r = requests.get(url, headers={"User-Agent": USER_AGENT, "Accept": "application/geo+json"},
-                         timeout=REQ_TIMEOUT)
-        if r.status_code == 429:
-            # Rate limit—brief backoff and retry once
-            time.sleep(1.0)
-            r = requests.get(url, headers={"User-Agent": USER_AGENT, "Accept": "application/geo+json"},
-                             timeout=REQ_TIMEOUT)
-        r.raise_for_status()
-        return r.json()
+        with instrumentation.span("points"):
+            r = nws_client().get(url, headers=NWS_HEADERS, timeout=REQ_TIMEOUT)
+            r.raise_for_status()
+        instrumentation.observe_size("points", len(r.content))
+        points = slim_points(r.json())
+        if points["properties"].get("forecast"):
+            cache.set(coords, points)
+            index = _point_index
+            if index is not None:
+                add_point(index, coords, points)
+                if len(index) > POINTS_CACHE_MAX_ENTRIES * POINT_INDEX_SLACK:
+                    # The cache has been evicting; rebuild from what it still holds. Waiting
+                    # for the slack to fill keeps that to one rebuild per ~10% of the cache.
+                    drop_point_index(index)
+        return points
     except requests.RequestException:
         return None
 
 
 def get_forecast(forecast_url: str):
-    """Fetch the 7-day forecast periods JSON from the provided forecast URL."""
+    """Fetch the 7-day forecast periods JSON from the provided forecast URL.
+
+    Results are cached per grid cell for as long as the response's caching headers allow,
+    and concurrent calls for the same grid cell share one request.
+    """
+    key = grid_cell_key(forecast_url)
+    return forecast_flight.do(key, fetch_forecast, key, forecast_url)
+
+
+def fetch_forecast(key: str, forecast_url: str):
+    """The cache, then NWS, for one grid cell (see get_forecast)."""
+    cache = get_forecast_cache()
+    cached = cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    update = fetch_forecast_update(forecast_url, key)
+    return update["periods"] if update else None
+
+
+def fetch_forecast_update(forecast_url: str, key: str = None):
+    """Fetch a forecast from NWS (skipping the cache lookup) and refresh the cache with it.
+
+    Returns {periods, update_time, generated_at, expires} or None on failure; expires is
+    the POSIX time until which the response's caching headers say it's good.
+    """
+    import requests
     try:
-        r = requests.get(forecast_url, headers={"User-Agent": USER_AGENT, "Accept": "application/geo+json"},
-                         timeout=REQ_TIMEOUT)
-        if r.status_code == 429:
-            time.sleep(1.0)
-            r = requests.get(forecast_url, headers={"User-Agent": USER_AGENT, "Accept": "application/geo+json"},
-                             timeout=REQ_TIMEOUT)
-        r.raise_for_status()
-        data = r.json()
-        periods = data.get("properties", {}).get("periods", [])
-        return periods
+        with instrumentation.span("forecast"):
+            r = nws_client().get(forecast_url, headers=NWS_HEADERS, timeout=REQ_TIMEOUT)
+            r.raise_for_status()
+        instrumentation.observe_size("forecast", len(r.content))
+        props = r.json().get("properties", {})
     except requests.RequestException:
         return None
+    periods = props.get("periods", [])
+    ttl = ttl_from_headers(r.headers, FORECAST_CACHE_DEFAULT_TTL)
+    if ttl > 0:
+        get_forecast_cache().set(key or grid_cell_key(forecast_url), periods, ttl=ttl)
+    return {
+        "periods": periods,
+        "update_time": props.get("updateTime"),
+        "generated_at": props.get("generatedAt"),
+        "expires": time.time() + ttl,
+    }
+
+
+def get_grid_document(url: str, kind: str):
+    """Fetch the 'properties' of an hourly forecast or raw gridpoint document, or None.
+
+    kind ('hourly' or 'grid') keeps them apart from the 7-day forecast in the shared
+    forecast cache; see grid_data.py for turning them into NumPy arrays.
+    """
+    key = f"{kind}:{grid_cell_key(url)}"
+    return forecast_flight.do(key, fetch_grid_document, key, url)
+
+
+def fetch_grid_document(key: str, url: str):
+    """The cache, then NWS, for one hourly / gridpoint document (see get_grid_document)."""
+    cache = get_forecast_cache()
+    cached = cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    import requests
+    kind = key.partition(":")[0]
+    try:
+        with instrumentation.span(kind):
+            r = nws_client().get(url, headers=NWS_HEADERS, timeout=REQ_TIMEOUT)
+            r.raise_for_status()
+        instrumentation.observe_size(kind, len(r.content))
+        props = r.json().get("properties", {})
+    except requests.RequestException:
+        return None
+    ttl = ttl_from_headers(r.headers, FORECAST_CACHE_DEFAULT_TTL)
+    if ttl > 0:
+        cache.set(key, props, ttl=ttl)
+    return props
 
 
 def pretty_location(points_json, fallback_display: str) -> str:
@@ -83,6 +451,23 @@ def pretty_location(points_json, fallback_display: str) -> str:
     return fallback_display
 
 
+def label_for(points_json, display: str, distance_km=None) -> str:
+    """pretty_location, except a forecast borrowed from a nearby point keeps the query's own name."""
+    return pretty_location(points_json, display) if distance_km is None else display
+
+
+def forecast_records(periods):
+    """Convert raw NWS periods into typed ForecastPeriod records."""
+    return [ForecastPeriod.from_nws(p) for p in periods or []]
+
+
+def nearby_label(location_label: str, distance_km=None) -> str:
+    """Location label, noting when the forecast was borrowed from a nearby point."""
+    if distance_km is None:
+        return location_label
+    return f"{location_label} (forecast for a point {distance_km:.1f} km away)"
+
+
 def print_forecast(location_label: str, periods):
     """Print a readable forecast table."""
     if not periods:
@@ -113,7 +498,230 @@ def print_forecast(location_label: str, periods):
         print(detailed)
 
 
-def main():
+def forecast_query(query: str) -> dict:
+    """Run the whole geocode -> points -> forecast chain for one query.
+
+    Returns the same dict shape run_batch yields (query, location, periods, error,
+    distance_km); distance_km is set when the forecast came from a nearby cached point.
+    """
+    result = {"query": query, "location": None, "periods": None, "error": None, "distance_km": None}
+    geocoded = geocode(query)
+    if not geocoded:
+        result["error"] = "Couldn't determine that location."
+        return result
+    lat, lon, display = geocoded
+    result["location"] = display
+    points, result["distance_km"] = points_near(lat, lon)
+    if not points:
+        result["error"] = "Couldn't reach NWS 'points' service."
+        return result
+    forecast_url = points.get("properties", {}).get("forecast")
+    if not forecast_url:
+        result["error"] = "NWS did not provide a forecast URL for this location."
+        return result
+    result["location"] = label_for(points, display, result["distance_km"])
+    periods = get_forecast(forecast_url)
+    if periods is None:
+        result["error"] = "Couldn't fetch the forecast from NWS."
+        return result
+    result["periods"] = periods
+    return result
+
+
+def read_queries(lines):
+    """Yield non-empty, non-comment queries from an iterable of lines."""
+    for line in lines:
+        query = line.strip()
+        if query and not query.startswith("#"):
+            yield query
+
+
+def run_batch(queries, geocode_workers: int = GEOCODE_WORKERS, points_workers: int = POINTS_WORKERS,
+              forecast_workers: int = FORECAST_WORKERS, max_pending: int = MAX_PENDING):
+    """Forecast many queries through a concurrent geocode -> points -> forecast pipeline.
+
+    Each stage runs in its own thread pool, so each has its own concurrency limit.
+    Yields one dict per query (query, location, periods, error, distance_km) as soon as
+    it finishes, which means results come back in completion order, not input order.
+    """
+    import queue
+    from concurrent.futures import ThreadPoolExecutor
+    results = queue.Queue()
+
+    def finish(query, location=None, periods=None, error=None, distance_km=None):
+        results.put({"query": query, "location": location, "periods": periods, "error": error,
+                     "distance_km": distance_km})
+
+    def guarded(query, stage, *args):
+        # A stage that blows up must still report, or the batch would wait forever.
+        try:
+            stage(query, *args)
+        except Exception as e:
+            finish(query, error=f"Unexpected error: {e}")
+
+    def do_forecast(query, location, forecast_url, distance_km=None):
+        periods = get_forecast(forecast_url)
+        if periods is None:
+            finish(query, location=location, error="Couldn't fetch the forecast from NWS.")
+        else:
+            finish(query, location=location, periods=periods, distance_km=distance_km)
+
+    def do_points(query, lat, lon, display):
+        points, distance_km = points_near(lat, lon)
+        if not points:
+            finish(query, location=display, error="Couldn't reach NWS 'points' service.")
+            return
+        forecast_url = points.get("properties", {}).get("forecast")
+        if not forecast_url:
+            finish(query, location=display, error="NWS did not provide a forecast URL for this location.")
+            return
+        forecast_pool.submit(guarded, query, do_forecast, label_for(points, display, distance_km), forecast_url,
+                             distance_km)
+
+    def do_geocode(query):
+        geocoded = geocode(query)
+        if not geocoded:
+            finish(query, error="Couldn't determine that location.")
+            return
+        points_pool.submit(guarded, query, do_points, *geocoded)
+
+    queries = iter(queries)
+    with ThreadPoolExecutor(geocode_workers, thread_name_prefix="geocode") as geocode_pool, \
+         ThreadPoolExecutor(points_workers, thread_name_prefix="points") as points_pool, \
+         ThreadPoolExecutor(forecast_workers, thread_name_prefix="forecast") as forecast_pool:
+        in_flight = 0
+        exhausted = False
+        while True:
+            # Keep the pipeline topped up, but never admit more than max_pending at once
+            while not exhausted and in_flight < max_pending:
+                query = next(queries, None)
+                if query is None:
+                    exhausted = True
+                    break
+                geocode_pool.submit(guarded, query, do_geocode)
+                in_flight += 1
+            if in_flight == 0:
+                break
+            yield results.get()
+            in_flight -= 1
+
+
+def collect_batch(queries, **pipeline_options):
+    """Run the batch pipeline into one columnar ForecastBatch.
+
+    Returns (batch, errors) where errors maps query -> message.
+    """
+    batch = ForecastBatch()
+    errors = {}
+    for result in run_batch(queries, **pipeline_options):
+        if result["error"]:
+            errors[result["query"]] = result["error"]
+        else:
+            batch.extend(result["location"], forecast_records(result["periods"]))
+    return batch, errors
+
+
+def batch_main(path: str, geocode_workers: int, points_workers: int, forecast_workers: int,
+               output: str = None, output_format: str = None) -> int:
+    """Run batch mode over a file of queries ('-' for stdin) and print results as they finish.
+
+    With output, periods go to a machine-readable sink (see forecast_export.py)
+    instead, and failed queries are reported on stderr.
+    """
+    sink = None
+    if output:
+        from forecast_export import open_sink
+        sink = open_sink(output, output_format)
+    src = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    failures = 0
+    try:
+        for result in run_batch(read_queries(src), geocode_workers, points_workers, forecast_workers):
+            if result["error"]:
+                failures += 1
+                print(f"\n{result['query']}: {result['error']}", file=sys.stderr if sink else sys.stdout)
+            elif sink:
+                sink.write(result["location"], forecast_records(result["periods"]))
+            else:
+                print_forecast(nearby_label(result["location"], result["distance_km"]), result["periods"])
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if sink:
+            sink.close()
+    return 1 if failures else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="NWS 7-day forecast by ZIP code or 'city, state'.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="forecast every ZIP / 'city, state' line in FILE ('-' for stdin)")
+    parser.add_argument("--geocode-workers", type=int, default=GEOCODE_WORKERS)
+    parser.add_argument("--points-workers", type=int, default=POINTS_WORKERS)
+    parser.add_argument("--forecast-workers", type=int, default=FORECAST_WORKERS)
+    parser.add_argument("--output", metavar="FILE",
+                        help="batch mode: write periods to FILE ('-' for stdout) instead of printing them")
+    parser.add_argument("--format", choices=("ndjson", "csv", "parquet", "arrow"),
+                        help="format for --output (default: from the file extension, else ndjson)")
+    parser.add_argument("--nearby-km", type=float, default=NEARBY_KM,
+                        help="reuse the cached forecast of any point within this many km (default: off)")
+    parser.add_argument("--cache-stats", action="store_true",
+                        help="print cache hit/miss and NWS retry/throttle counts before exiting")
+    instrumentation.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def print_cache_stats():
+    if get_zip_index():
+        print(f"Offline ZIP index: {local_geocode_hits} hits", file=sys.stderr)
+    if NEARBY_KM > 0:
+        print(f"Nearby reuse (within {NEARBY_KM:g} km): {nearby_hits} forecasts served from a cached point "
+              f"({len(get_point_index())} points indexed)", file=sys.stderr)
+    caches = [("Geocode", get_geocode_cache()), ("Points", get_points_cache()), ("Forecast", get_forecast_cache())]
+    for name, cache in caches:
+        stats = cache.stats()
+        print(f"{name} cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} entries)", file=sys.stderr)
+    if _nws_client is None:
+        print("NWS requests: none (everything came from the caches)", file=sys.stderr)
+    else:
+        m = _nws_client.metrics()
+        print(f"NWS requests: {m['retries']} retries, {m['gave_up']} gave up, "
+              f"{m['throttled_seconds']}s throttled, {m['backoff_seconds']}s backing off, "
+              f"{m['not_modified']} not modified", file=sys.stderr)
+    for flight in (geocode_flight, points_flight, forecast_flight):
+        stats = flight.stats()
+        print(f"{flight.name.capitalize()} coalescing: {stats['calls']} upstream lookups, "
+              f"{stats['saved']} saved ({stats['saved_rate']:.0%})", file=sys.stderr)
+
+
+def main(argv=None):
+    global NEARBY_KM
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "serve":
+        from forecast_service import serve_main
+        # --nearby-km applies to the service too; the rest is serve_main's
+        nearby = argparse.ArgumentParser(add_help=False)
+        nearby.add_argument("--nearby-km", type=float, default=NEARBY_KM)
+        known, rest = nearby.parse_known_args(argv[1:])
+        NEARBY_KM = known.nearby_km
+        sys.exit(serve_main(rest, forecast_query, normalize_query))
+
+    args = parse_args(argv)
+    NEARBY_KM = args.nearby_km
+    if args.cache_stats:
+        atexit.register(print_cache_stats)
+    if args.metrics:
+        atexit.register(instrumentation.write_metrics, args.metrics)
+    with instrumentation.profiled(args.profile, args.profile_out):
+        run(args)
+
+
+def run(args):
+    """Batch or interactive mode: everything main() does once the arguments are parsed."""
+    if args.batch:
+        sys.exit(batch_main(args.batch, args.geocode_workers, args.points_workers, args.forecast_workers,
+                            args.output, args.format))
+
     print("NWS 7-Day Forecast")
     print("------------------")
     query = input("Enter ZIP code or 'city, state' (e.g., 44512 or 'Youngstown, OH'): ").strip()
@@ -130,7 +738,7 @@ def main():
     lat, lon, display = geocoded
 
     # 2) Get NWS 'points' metadata (contains forecast URL and a nice location label)
-    points = get_points_metadata(lat, lon)
+    points, distance_km = points_near(lat, lon)
     if not points:
         print("Couldn't reach NWS 'points' service. Check your internet connection and try again.")
         sys.exit(3)
@@ -147,7 +755,7 @@ def main():
         sys.exit(5)
 
     # 4) Print
-    loc_label = pretty_location(points, display)
+    loc_label = nearby_label(label_for(points, display, distance_km), distance_km)
     print_forecast(loc_label, periods)
 
 
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Offline US ZIP -> coordinate index, memory-mapped
+- Fixed-size records sorted by ZIP, so a ZIP lookup is a binary search over the mmap
+- A second sorted table (by city, then state) for "city, state" and city-prefix lookups
+- Nothing is loaded up front; opening the index just maps the file
+
+Build the index file once from the GeoNames US postal code dump
+(https://download.geonames.org/export/zip/US.zip -> US.txt) or from a CSV with
+zip,lat,lon,city,state columns:
+  python zip_index.py build US.txt data/zip_index.bin
+
+Look things up:
+  python zip_index.py 44512
+  python zip_index.py "youngs, oh"
+
+Only uses the standard library.
+"""
+
+import os
+import re
+import csv
+import sys
+import mmap
+import struct
+from collections import namedtuple
+
+MAGIC = b"ZIPIDX1\0"
+HEADER = struct.Struct("<8sII")           # magic, record count, city table offset
+RECORD = struct.Struct("<5s2sdd40s")      # zip, state, lat, lon, city (utf-8, NUL padded)
+CITY_SLOT = struct.Struct("<I")           # record number, in (city, state) order
+
+ZipRecord = namedtuple("ZipRecord", "zip state lat lon city")
+
+
+def normalize_city(city: str) -> str:
+    """'St. Louis' -> 'st louis', 'Winston-Salem' -> 'winston salem'."""
+    city = re.sub(r"[^a-z0-9 ]+", " ", city.lower())
+    return re.sub(r"\s+", " ", city).strip()
+
+
+def _read_rows(path: str):
+    """Yield (zip, lat, lon, city, state) from a GeoNames dump or a zip,lat,lon,city,state CSV."""
+    with open(path, encoding="utf-8", newline="") as f:
+        first = f.readline()
+        f.seek(0)
+        if "\t" in first:
+            # GeoNames: country, zip, place, state name, state code, ..., lat, lon, accuracy
+            for cols in csv.reader(f, delimiter="\t"):
+                if len(cols) >= 11 and cols[0] == "US":
+                    yield cols[1], float(cols[9]), float(cols[10]), cols[2], cols[4]
+        else:
+            for row in csv.DictReader(f):
+                yield row["zip"], float(row["lat"]), float(row["lon"]), row["city"], row["state"]
+
+
+def build_index(src_path: str, out_path: str) -> int:
+    """Write the binary index for src_path to out_path. Returns the number of ZIPs."""
+    rows = {}
+    for zip_code, lat, lon, city, state in _read_rows(src_path):
+        zip_code = zip_code.strip().zfill(5)
+        if re.fullmatch(r"\d{5}", zip_code) and len(state) == 2:
+            # Trim to the stored width now, so the city table is sorted by what's on disk
+            city = city.strip().encode("utf-8")[:40].decode("utf-8", "ignore")
+            rows[zip_code] = (lat, lon, city, state.upper())
+    zips = sorted(rows)
+    by_city = sorted(range(len(zips)),
+                     key=lambda i: (normalize_city(rows[zips[i]][2]), rows[zips[i]][3], zips[i]))
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "wb") as out:
+        city_offset = HEADER.size + RECORD.size * len(zips)
+        out.write(HEADER.pack(MAGIC, len(zips), city_offset))
+        for z in zips:
+            lat, lon, city, state = rows[z]
+            out.write(RECORD.pack(z.encode(), state.encode(), lat, lon, city.encode("utf-8")))
+        for i in by_city:
+            out.write(CITY_SLOT.pack(i))
+    return len(zips)
+
+
+class ZipIndex:
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self._city_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a ZIP index (rebuild it with 'zip_index.py build')")
+
+    def _record(self, i: int) -> ZipRecord:
+        z, state, lat, lon, city = RECORD.unpack_from(self._map, HEADER.size + i * RECORD.size)
+        return ZipRecord(z.decode(), state.decode(), lat, lon, city.rstrip(b"\0").decode("utf-8", "replace"))
+
+    def _zip_at(self, i: int) -> bytes:
+        off = HEADER.size + i * RECORD.size
+        return self._map[off:off + 5]
+
+    def _city_record(self, slot: int) -> ZipRecord:
+        (i,) = CITY_SLOT.unpack_from(self._map, self._city_offset + slot * CITY_SLOT.size)
+        return self._record(i)
+
+    def lookup_zip(self, zip_code: str):
+        """ZipRecord for a 5-digit ZIP, or None. Binary search over the mapped records."""
+        key = zip_code.encode()
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._zip_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._zip_at(lo) == key:
+            return self._record(lo)
+        return None
+
+    def lookup_city(self, city: str, state: str = None, limit: int = 50):
+        """ZIPs whose city starts with `city` (normalized), optionally in `state`.
+
+        Exact city-name matches come first, then prefix matches, in (city, state) order.
+        """
+        prefix = normalize_city(city)
+        if not prefix:
+            return []
+        state = state.upper() if state else None
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if normalize_city(self._city_record(mid).city) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        exact, partial = [], []
+        for slot in range(lo, self.count):
+            rec = self._city_record(slot)
+            name = normalize_city(rec.city)
+            if not name.startswith(prefix):
+                break
+            if state and rec.state != state:
+                continue
+            (exact if name == prefix else partial).append(rec)
+            if len(exact) + len(partial) >= limit:
+                break
+        return exact + partial
+
+    def resolve(self, city: str, state: str = None):
+        """Best single (lat, lon, 'City, ST') for a city: centroid of its ZIPs, or None."""
+        matches = self.lookup_city(city, state)
+        if not matches:
+            return None
+        # All ZIPs of the first matching city/state, averaged
+        first = matches[0]
+        same = [m for m in matches if m.city == first.city and m.state == first.state]
+        lat = sum(m.lat for m in same) / len(same)
+        lon = sum(m.lon for m in same) / len(same)
+        return lat, lon, f"{first.city}, {first.state}"
+
+    def cities(self):
+        """Every distinct (city, state), in (city, state) order."""
+        last = None
+        for slot in range(self.count):
+            rec = self._city_record(slot)
+            if (rec.city, rec.state) != last:
+                last = (rec.city, rec.state)
+                yield last
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def main(argv):
+    if len(argv) == 3 and argv[0] == "build":
+        count = build_index(argv[1], argv[2])
+        print(f"Wrote {count} ZIPs to {argv[2]}")
+        return 0
+    if len(argv) not in (1, 2):
+        print(__doc__)
+        return 1
+    index = ZipIndex(argv[1] if len(argv) == 2 else "data/zip_index.bin")
+    query = argv[0].strip()
+    if re.fullmatch(r"\d{5}", query):
+        print(index.lookup_zip(query))
+    else:
+        city, _, state = query.partition(",")
+        for rec in index.lookup_city(city, state.strip() or None, limit=10):
+            print(rec)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))